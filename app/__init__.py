@@ -1,23 +1,60 @@
 from flask import Flask
-from flask_restful import Api
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 
+from app.common.metrics import init_metrics
+from app.common.profiler import init_profiler
+from app.common.query_budget import init_query_budget
+from app.common.recorder import init_request_recorder
+from app.common.replicas import RoutingSQLAlchemy
+from app.common.slow_queries import init_slow_query_log
 from config import Config
 
-app = Flask(__name__)
-app.config.from_object(Config)
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-
-from app.resources.robot import RobotAPI, RobotListAPI
-from app.resources.route import RouteAPI, RouteListAPI
-from app.resources.docking_station import DockingStationAPI, DockingStationListAPI
-
-api = Api(app)
-api.add_resource(RobotAPI, '/api/v1.0/robots/<int:id>', endpoint='robot')
-api.add_resource(RobotListAPI, '/api/v1.0/robots', endpoint='robots')
-api.add_resource(RouteAPI, '/api/v1.0/routes/<int:id>', endpoint='route')
-api.add_resource(RouteListAPI, '/api/v1.0/routes', endpoint='routes')
-api.add_resource(DockingStationAPI, '/api/v1.0/docking_stations/<int:id>', endpoint='docking_station')
-api.add_resource(DockingStationListAPI, '/api/v1.0/docking_stations', endpoint='docking_stations')
+# bound to each app by create_app, models only need the metadata and the session
+db = RoutingSQLAlchemy()
+
+
+def create_app(config=Config):
+    """
+    Build an app from a config object.
+
+    Nothing connects to the database here: engines and their pools are created on first use,
+    in the process that uses them, so a pre-fork server can build the app before forking.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    db.init_app(app)
+    register_resources(app)
+
+    init_request_recorder(app)
+    init_metrics(app)
+    init_query_budget(app)
+    init_slow_query_log(app)
+    init_profiler(app)
+
+    @app.before_first_request
+    def load_spatial_index():
+        if app.config['DOCKING_STATION_SPATIAL_INDEX']:
+            from app.models.docking_station import DockingStation
+            DockingStation.load_spatial_index()
+
+    return app
+
+
+def register_resources(app):
+    # resources import the models and their schemas, and with them geoalchemy2 and marshmallow
+    from flask_restful import Api
+
+    from app.resources.robot import RobotAPI, RobotListAPI, RobotPositionsAPI, RobotReassignmentAPI, RobotSnapshotAPI
+    from app.resources.route import RouteAPI, RouteListAPI
+    from app.resources.docking_station import DockingStationAPI, DockingStationListAPI
+
+    api = Api(app)
+    api.add_resource(RobotAPI, '/api/v1.0/robots/<int:id>', endpoint='robot')
+    api.add_resource(RobotListAPI, '/api/v1.0/robots', endpoint='robots')
+    api.add_resource(RobotSnapshotAPI, '/api/v1.0/robots/snapshot', endpoint='robots_snapshot')
+    api.add_resource(RobotPositionsAPI, '/api/v1.0/robots/positions', endpoint='robots_positions')
+    api.add_resource(RobotReassignmentAPI, '/api/v1.0/robots/reassignments', endpoint='robots_reassignments')
+    api.add_resource(RouteAPI, '/api/v1.0/routes/<int:id>', endpoint='route')
+    api.add_resource(RouteListAPI, '/api/v1.0/routes', endpoint='routes')
+    api.add_resource(DockingStationAPI, '/api/v1.0/docking_stations/<int:id>', endpoint='docking_station')
+    api.add_resource(DockingStationListAPI, '/api/v1.0/docking_stations', endpoint='docking_stations')
+    return api
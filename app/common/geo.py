@@ -0,0 +1,233 @@
+import math
+import struct
+
+import numpy as np
+
+from app.common.spatial_index import EARTH_RADIUS
+from app.models import InvalidArguments
+
+WGS84_SRID = 4326
+# EWKB little endian linestring with an srid: byte order, type | srid flag, srid, point count
+EWKB_LINESTRING_HEADER = struct.Struct('<BIII')
+EWKB_LINESTRING = 2
+EWKB_SRID_FLAG = 0x20000000
+
+# station x segment distances computed per chunk of stations, to bound memory
+CHUNK_ELEMENTS = 2 ** 21
+# slack for float error, so a station on the route is within a radius of 0
+DISTANCE_TOLERANCE = 0.01
+# meters between the end of one polyline and the start of the next when they are measured together
+POLYLINE_GAP = 1.0
+
+
+def validate_points(points):
+    """[[longitude, latitude], ...] as an (n, 2) float64 array, checked in one pass."""
+    try:
+        points = np.asarray(points, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise InvalidArguments('Points must be a list of [longitude, latitude] pairs')
+
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise InvalidArguments('Points must be a list of [longitude, latitude] pairs')
+    if len(points) < 2:
+        raise InvalidArguments('A route must have at least 2 points')
+
+    longitudes = points[:, 0]
+    latitudes = points[:, 1]
+    # written so NaN is out of range too
+    in_range = (latitudes >= -90) & (latitudes <= 90) & (longitudes >= -180) & (longitudes <= 180)
+    if not in_range.all():
+        raise InvalidArguments('Latitude and/or Longitude are out of range')
+
+    return points
+
+
+def linestring_ewkb(points, srid=WGS84_SRID):
+    points = np.asarray(points, dtype='<f8')
+    header = EWKB_LINESTRING_HEADER.pack(1, EWKB_LINESTRING | EWKB_SRID_FLAG, srid, len(points))
+    return header + points.tobytes()
+
+
+def pack_points(points):
+    # [[longitude, latitude], ...] as little endian float64 pairs, 16 bytes a point
+    return np.asarray(points, dtype='<f8').reshape(-1, 2).tobytes()
+
+
+def unpack_points(data):
+    return np.frombuffer(data, dtype='<f8').reshape(-1, 2)
+
+
+def to_unit_vectors(points):
+    # [[longitude, latitude], ...] in degrees to points on the unit sphere
+    radians = np.radians(np.asarray(points, dtype=np.float64).reshape(-1, 2))
+    cos_latitude = np.cos(radians[:, 1])
+    return np.column_stack((
+        cos_latitude * np.cos(radians[:, 0]),
+        cos_latitude * np.sin(radians[:, 0]),
+        np.sin(radians[:, 1]),
+    ))
+
+
+def from_unit_vectors(vectors):
+    # points on the unit sphere to [[longitude, latitude], ...] in degrees
+    return np.column_stack((
+        np.degrees(np.arctan2(vectors[:, 1], vectors[:, 0])),
+        np.degrees(np.arctan2(vectors[:, 2], np.hypot(vectors[:, 0], vectors[:, 1]))),
+    ))
+
+
+def _segment_normals(starts, ends):
+    normals = np.cross(starts, ends)
+    norms = np.linalg.norm(normals, axis=1)
+    degenerate = norms < 1e-15
+    normals[~degenerate] /= norms[~degenerate, np.newaxis]
+    return normals, degenerate
+
+
+def _is_within_arcs(points, normals, starts, ends):
+    # a point's projection onto a segment's great circle falls between the segment's
+    # ends when (A x P).N >= 0 and (P x B).N >= 0, i.e. P.(N x A) >= 0 and P.(B x N) >= 0
+    return (points.dot(np.cross(normals, starts).T) >= 0) & (points.dot(np.cross(ends, normals).T) >= 0)
+
+
+def _angles(points, others):
+    return np.arctan2(np.linalg.norm(np.cross(points, others), axis=1), np.einsum('ij,ij->i', points, others))
+
+
+def _segment_distances(points, starts, ends, normals, within):
+    # angular distance from each point to its own segment
+    nearest = np.minimum(_angles(points, starts), _angles(points, ends))
+    cross_track = np.arcsin(np.clip(np.abs(np.einsum('ij,ij->i', points, normals)), 0, 1))
+    return np.where(within, np.minimum(nearest, cross_track), nearest)
+
+
+def points_to_polyline_distances(points, polyline):
+    """
+    Great circle distance in meters from each point to the nearest segment of polyline.
+
+    points and polyline are [[longitude, latitude], ...] in degrees.
+    """
+    points = to_unit_vectors(points)
+    vertices = to_unit_vectors(polyline)
+    starts = vertices[:-1]
+    ends = vertices[1:]
+    normals, degenerate = _segment_normals(starts, ends)
+
+    distances = np.empty(len(points))
+    chunk_size = max(1, CHUNK_ELEMENTS // max(1, len(starts)))
+    for i in range(0, len(points), chunk_size):
+        chunk = points[i:i + chunk_size]
+
+        to_starts = np.arccos(np.clip(chunk.dot(starts.T), -1, 1))
+        to_ends = np.arccos(np.clip(chunk.dot(ends.T), -1, 1))
+        cross_track = np.arcsin(np.clip(np.abs(chunk.dot(normals.T)), 0, 1))
+        within = _is_within_arcs(chunk, normals, starts, ends) & ~degenerate
+
+        nearest = np.minimum(to_starts, to_ends)
+        nearest = np.where(within, np.minimum(nearest, cross_track), nearest)
+
+        # arccos loses precision near 0, so measure the nearest segment again with atan2
+        segments = nearest.argmin(axis=1)
+        distances[i:i + chunk_size] = _segment_distances(
+            chunk, starts[segments], ends[segments], normals[segments],
+            within[np.arange(len(chunk)), segments]) * EARTH_RADIUS
+
+    return distances
+
+
+def polyline_bounding_box(polyline, m_radius):
+    """
+    (min_longitude, min_latitude, max_longitude, max_latitude) containing every point
+    within m_radius of polyline. Longitudes are None when they can't be bounded.
+    """
+    polyline = np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+    vertices = to_unit_vectors(polyline)
+    starts = vertices[:-1]
+    ends = vertices[1:]
+    normals, degenerate = _segment_normals(starts, ends)
+
+    min_latitude = polyline[:, 1].min()
+    max_latitude = polyline[:, 1].max()
+
+    # great circle arcs bulge towards the poles, past the latitude of their ends
+    north = np.array([0.0, 0.0, 1.0]) - normals[:, 2, np.newaxis] * normals
+    north_norms = np.linalg.norm(north, axis=1)
+    has_vertex = ~degenerate & (north_norms > 1e-15)
+    if has_vertex.any():
+        north = north[has_vertex] / north_norms[has_vertex, np.newaxis]
+        seg_normals, seg_starts, seg_ends = normals[has_vertex], starts[has_vertex], ends[has_vertex]
+        vertex_latitudes = np.degrees(np.arcsin(np.clip(north[:, 2], -1, 1)))
+        for vertex, sign in ((north, 1), (-north, -1)):
+            within = np.einsum('ij,ij->i', vertex, np.cross(seg_normals, seg_starts)) >= 0
+            within &= np.einsum('ij,ij->i', vertex, np.cross(seg_ends, seg_normals)) >= 0
+            if within.any():
+                if sign > 0:
+                    max_latitude = max(max_latitude, vertex_latitudes[within].max())
+                else:
+                    min_latitude = min(min_latitude, -vertex_latitudes[within].max())
+
+    angular_radius = m_radius / EARTH_RADIUS
+    lat_radius = math.degrees(angular_radius)
+    min_latitude -= lat_radius
+    max_latitude += lat_radius
+
+    crosses_antimeridian = (np.abs(np.diff(polyline[:, 0])) > 180).any()
+    extreme_latitude = math.radians(max(abs(min_latitude), abs(max_latitude)))
+    if crosses_antimeridian or min_latitude <= -90 or max_latitude >= 90 or \
+            math.sin(angular_radius) >= math.cos(extreme_latitude):
+        return None, max(min_latitude, -90), None, min(max_latitude, 90)
+
+    lon_radius = math.degrees(math.asin(math.sin(angular_radius) / math.cos(extreme_latitude)))
+    min_longitude = polyline[:, 0].min() - lon_radius
+    max_longitude = polyline[:, 0].max() + lon_radius
+    if min_longitude < -180 or max_longitude > 180:
+        # wraps around the antimeridian
+        return None, min_latitude, None, max_latitude
+
+    return min_longitude, min_latitude, max_longitude, max_latitude
+
+
+def interpolate_along_polylines(polylines, polyline_indexes, distances):
+    """
+    [[longitude, latitude], ...] of the points distances[i] meters along polylines[polyline_indexes[i]].
+
+    Every polyline is measured once, however many distances are along it, and every point is
+    found in the same vectorized pass. Distances are clamped to their polyline, so a negative
+    distance gives its first point and one past its end its last point. Polylines are
+    [[longitude, latitude], ...] in degrees with at least 2 points.
+    """
+    polyline_indexes = np.asarray(polyline_indexes, dtype=np.intp)
+    distances = np.asarray(distances, dtype=np.float64)
+    if not len(polyline_indexes):
+        return np.empty((0, 2))
+
+    sizes = np.array([len(polyline) for polyline in polylines])
+    firsts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    lasts = firsts + sizes - 1
+    vertices = to_unit_vectors(np.concatenate([np.asarray(polyline, dtype=np.float64).reshape(-1, 2)
+                                               for polyline in polylines]))
+
+    # cumulative great circle lengths of every polyline in one ascending array, each starting
+    # a gap past the end of the one before, so one searchsorted finds every segment
+    steps = np.empty(len(vertices))
+    steps[1:] = _angles(vertices[:-1], vertices[1:]) * EARTH_RADIUS
+    steps[firsts] = POLYLINE_GAP
+    lengths = np.cumsum(steps)
+
+    starts = firsts[polyline_indexes]
+    targets = lengths[starts] + np.clip(distances, 0, lengths[lasts[polyline_indexes]] - lengths[starts])
+    segments = np.clip(np.searchsorted(lengths, targets, side='right') - 1, starts, lasts[polyline_indexes] - 1)
+
+    segment_lengths = lengths[segments + 1] - lengths[segments]
+    fractions = np.divide(targets - lengths[segments], segment_lengths,
+                          out=np.zeros_like(targets), where=segment_lengths > 0)
+
+    # along the great circle of each segment
+    segment_starts, segment_ends = vertices[segments], vertices[segments + 1]
+    angles = _angles(segment_starts, segment_ends)
+    sin_angles = np.sin(angles)
+    short = sin_angles < 1e-12
+    sin_angles[short] = 1
+    start_weights = np.where(short, 1 - fractions, np.sin((1 - fractions) * angles) / sin_angles)
+    end_weights = np.where(short, fractions, np.sin(fractions * angles) / sin_angles)
+    return from_unit_vectors(start_weights[:, np.newaxis] * segment_starts + end_weights[:, np.newaxis] * segment_ends)
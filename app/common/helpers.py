@@ -1,6 +1,9 @@
 from datetime import datetime
+from flask import current_app
 from app.models import InvalidArguments
 
+MAX_PAGE_LIMIT = 1000
+
 def validate_point(longitude, latitude):
     if not(-90 <= latitude <= 90 and -180 <= longitude <= 180):
         raise InvalidArguments('Latitude and/or Longitude are out of range')
@@ -23,3 +26,26 @@ def validate_and_extract_datetimes(query_string):
     end_dt = datetime.utcfromtimestamp(end_ts) if end_ts else None
 
     return target_dt, start_dt, end_dt
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def default_page_limit():
+    return min(current_app.config.get('DEFAULT_PAGE_LIMIT', MAX_PAGE_LIMIT), MAX_PAGE_LIMIT)
+
+
+def validate_and_extract_page(query_string, streamed=False):
+    # a list is always paged, by DEFAULT_PAGE_LIMIT without a limit, unless it is streamed
+    limit = query_string.get('limit')
+    after_id = query_string.get('after_id')
+    if limit is None and not streamed:
+        limit = default_page_limit()
+
+    if limit is not None and (not _is_int(limit) or not 1 <= limit <= MAX_PAGE_LIMIT):
+        raise InvalidArguments('limit must be an integer from 1 to {}'.format(MAX_PAGE_LIMIT))
+    if after_id is not None and not _is_int(after_id):
+        raise InvalidArguments('after_id must be an integer')
+
+    return limit, after_id
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, has_request_context, request
+
+from app.common import sql_events
+
+# prometheus' default latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# the per-request record lives in the wsgi environ, so it cannot leak between requests
+ENVIRON_KEY = 'delivery.metrics'
+
+
+def init_metrics(app):
+    """Record per endpoint request, sql and serialization metrics and serve them at /metrics."""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_record_status)
+    # teardown runs after a streamed response has been written, so its work is counted
+    app.teardown_request(_finish_request)
+    app.json_encoder = timed_json_encoder(app.json_encoder)
+    app.add_url_rule('/metrics', 'metrics', lambda: Response(metrics.render(), mimetype=PROMETHEUS_MIMETYPE))
+    sql_events.subscribe(_observe_statement)
+
+
+class RequestMetrics(object):
+    __slots__ = ('start', 'status', 'sql_statements', 'sql_seconds', 'serialization_seconds')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.status = 500
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+
+
+def current_request_metrics():
+    if not has_request_context():
+        return None
+    return request.environ.get(ENVIRON_KEY)
+
+
+def observe_serialization(seconds):
+    record = current_request_metrics()
+    if record is not None:
+        record.serialization_seconds += seconds
+
+
+def timed_json_encoder(encoder_cls):
+    class TimedJSONEncoder(encoder_cls):
+        def encode(self, o):
+            start = time.perf_counter()
+            try:
+                return super(TimedJSONEncoder, self).encode(o)
+            finally:
+                observe_serialization(time.perf_counter() - start)
+
+    return TimedJSONEncoder
+
+
+class Metrics(object):
+    """Totals by endpoint for the life of the process. Each worker process serves its own."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.bucket_counts = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+            self.latency_sums = defaultdict(float)
+            self.requests = defaultdict(int)
+            self.sql_statements = defaultdict(int)
+            self.sql_seconds = defaultdict(float)
+            self.serialization_seconds = defaultdict(float)
+
+    def observe(self, endpoint, method, status, seconds, record):
+        bucket = len(self.buckets)
+        for i, upper_bound in enumerate(self.buckets):
+            if seconds <= upper_bound:
+                bucket = i
+                break
+
+        with self._lock:
+            self.bucket_counts[endpoint][bucket] += 1
+            self.latency_sums[endpoint] += seconds
+            self.requests[(endpoint, method, status)] += 1
+            self.sql_statements[endpoint] += record.sql_statements
+            self.sql_seconds[endpoint] += record.sql_seconds
+            self.serialization_seconds[endpoint] += record.serialization_seconds
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP delivery_request_duration_seconds Request latency by endpoint.',
+                '# TYPE delivery_request_duration_seconds histogram',
+            ]
+            for endpoint in sorted(self.bucket_counts):
+                cumulative = 0
+                for upper_bound, count in zip(self.buckets + (float('inf'),), self.bucket_counts[endpoint]):
+                    cumulative += count
+                    lines.append('delivery_request_duration_seconds_bucket{{endpoint="{}",le="{}"}} {}'.format(
+                        endpoint, _format_bound(upper_bound), cumulative))
+                lines.append('delivery_request_duration_seconds_sum{{endpoint="{}"}} {}'.format(
+                    endpoint, self.latency_sums[endpoint]))
+                lines.append('delivery_request_duration_seconds_count{{endpoint="{}"}} {}'.format(
+                    endpoint, cumulative))
+
+            lines.extend([
+                '# HELP delivery_requests_total Requests by endpoint, method and status.',
+                '# TYPE delivery_requests_total counter',
+            ])
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append('delivery_requests_total{{endpoint="{}",method="{}",status="{}"}} {}'.format(
+                    endpoint, method, status, count))
+
+            for name, help_text, values in (
+                ('delivery_sql_statements_total', 'SQL statements run by endpoint.', self.sql_statements),
+                ('delivery_sql_duration_seconds_total', 'Time spent in SQL statements by endpoint.',
+                 self.sql_seconds),
+                ('delivery_serialization_duration_seconds_total',
+                 'Time spent dumping schemas and encoding JSON by endpoint.', self.serialization_seconds),
+            ):
+                lines.extend(['# HELP {} {}'.format(name, help_text), '# TYPE {} counter'.format(name)])
+                for endpoint in sorted(values):
+                    lines.append('{}{{endpoint="{}"}} {}'.format(name, endpoint, values[endpoint]))
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_bound(upper_bound):
+    return '+Inf' if upper_bound == float('inf') else repr(upper_bound)
+
+
+def _start_request():
+    if request.endpoint != 'metrics':
+        request.environ[ENVIRON_KEY] = RequestMetrics()
+
+
+def _record_status(response):
+    record = current_request_metrics()
+    if record is not None:
+        record.status = response.status_code
+    return response
+
+
+def _finish_request(exception=None):
+    record = request.environ.pop(ENVIRON_KEY, None)
+    if record is not None:
+        metrics.observe(request.endpoint or 'unmatched', request.method, record.status,
+                        time.perf_counter() - record.start, record)
+
+
+def _observe_statement(conn, statement, parameters, seconds, executemany):
+    record = current_request_metrics()
+    if record is not None:
+        record.sql_statements += 1
+        record.sql_seconds += seconds
+
+
+metrics = Metrics()
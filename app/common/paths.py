@@ -0,0 +1,14 @@
+import os
+from functools import lru_cache
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(APP_ROOT)
+
+
+@lru_cache(maxsize=None)
+def app_path(filename):
+    """The path of a file of the app relative to the project, e.g. app/models/robot.py, None for other files."""
+    filename = os.path.abspath(filename)
+    if not filename.startswith(APP_ROOT + os.sep):
+        return None
+    return os.path.relpath(filename, PROJECT_ROOT)
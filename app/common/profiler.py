@@ -0,0 +1,186 @@
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+
+from flask import current_app, request
+
+from app.common.paths import app_path
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '__profile'
+ENVIRON_KEY = 'delivery.profiler'
+# the first of these found in a frame's path, innermost frame first, is the category of a
+# sample. None skips the frame, as do frames that match nothing
+CATEGORY_PATHS = (
+    (None, ('/sqlalchemy/event/', '/sqlalchemy/util/')),
+    ('db', ('/sqlalchemy/engine/', '/sqlalchemy/pool/', '/psycopg2/')),
+    ('orm', ('/sqlalchemy/', '/flask_sqlalchemy/', '/geoalchemy2/')),
+    ('serialization', ('/marshmallow/', '/json/')),
+    ('dispatch', ('/flask_restful/', '/flask/', '/werkzeug/')),
+)
+APP_CATEGORIES = (
+    ('app/schemas/', 'serialization'),
+    ('app/models/', 'models'),
+    ('app/resources/', 'resources'),
+)
+_profile_arg = re.compile(r'(^|&){}=1(?=&|$)'.format(PROFILE_ARG))
+
+
+def init_profiler(app):
+    """
+    Profile requests sent with an X-Profile: 1 header or a __profile=1 argument, if PROFILING_ENABLED.
+
+    The profile is written to PROFILE_DIR as folded stacks, which flamegraph.pl and speedscope
+    read, and the response gets its path in X-Profile-Path. Unless the response is streamed it
+    also gets X-Profile-Breakdown, the share of samples by category.
+    """
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_finish_response)
+    app.teardown_request(_finish_request)
+
+
+class SamplingProfiler(object):
+    """
+    Samples the stack of one thread from another every interval seconds.
+
+    The sampling thread needs the GIL, so while the profiled thread holds it, samples are
+    taken at most every sys.getswitchinterval(). Waiting on the database releases it.
+    """
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = interval
+        # stacks of code objects, innermost first
+        self.samples = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(stack)] += 1
+
+    def folded(self):
+        # outermost frame first, as flame graphs expect
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append('{} {}'.format(';'.join(_frame_name(code) for code in reversed(stack)), count))
+        return '\n'.join(lines) + '\n'
+
+    def breakdown(self):
+        categories = Counter()
+        for stack, count in self.samples.items():
+            categories[_stack_category(stack)] += count
+        return categories
+
+
+def wants_profile():
+    return request.headers.get(PROFILE_HEADER) == '1' or request.args.get(PROFILE_ARG) == '1'
+
+
+def format_breakdown(categories):
+    total = sum(categories.values())
+    if not total:
+        return 'no samples'
+    return ', '.join('{}={:.1f}%'.format(category, count * 100.0 / total)
+                     for category, count in categories.most_common())
+
+
+def _start_request():
+    if not wants_profile():
+        return
+
+    # the resources read the raw query string as json, so the argument is taken out of it
+    query_string = request.environ.get('QUERY_STRING', '')
+    request.environ['QUERY_STRING'] = _profile_arg.sub('', query_string).lstrip('&')
+
+    path = os.path.join(current_app.config.get('PROFILE_DIR') or tempfile.gettempdir(), '{}-{}-{}.folded'.format(
+        time.strftime('%Y%m%dT%H%M%S'), request.endpoint or 'unmatched', uuid.uuid4().hex[:8]))
+    interval = current_app.config.get('PROFILE_INTERVAL_MS', 1) / 1000.0
+    request.environ[ENVIRON_KEY] = (SamplingProfiler(threading.get_ident(), interval).start(), path)
+
+
+def _finish_response(response):
+    profiled = request.environ.get(ENVIRON_KEY)
+    if profiled is None:
+        return response
+
+    response.headers['X-Profile-Path'] = profiled[1]
+    if not response.is_streamed:
+        response.headers['X-Profile-Breakdown'] = _finish_request()
+    return response
+
+
+def _finish_request(exception=None):
+    profiled = request.environ.pop(ENVIRON_KEY, None)
+    if profiled is None:
+        return None
+
+    profiler, path = profiled
+    profiler.stop()
+    with open(path, 'w') as f:
+        f.write(profiler.folded())
+
+    breakdown = format_breakdown(profiler.breakdown())
+    current_app.logger.info('profile of %s %s written to %s: %s', request.method, request.path, path, breakdown)
+    return breakdown
+
+
+@lru_cache(maxsize=None)
+def _frame_name(code):
+    return '{} ({}:{})'.format(code.co_name, _short_path(code.co_filename), code.co_firstlineno)
+
+
+@lru_cache(maxsize=None)
+def _short_path(filename):
+    path = app_path(filename)
+    if path is not None:
+        return path
+    filename = os.path.abspath(filename)
+    if 'site-packages' + os.sep in filename:
+        return filename.split('site-packages' + os.sep, 1)[1]
+    return os.path.basename(filename)
+
+
+def _stack_category(stack):
+    for code in stack:
+        category = _file_category(code.co_filename)
+        if category:
+            return category
+    return 'other'
+
+
+@lru_cache(maxsize=None)
+def _file_category(filename):
+    path = _short_path(filename)
+    for prefix, category in APP_CATEGORIES:
+        if path.startswith(prefix):
+            return category
+
+    filename = os.path.abspath(filename).replace(os.sep, '/')
+    for category, parts in CATEGORY_PATHS:
+        if any(part in filename for part in parts):
+            return category
+    return None
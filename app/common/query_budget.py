@@ -0,0 +1,163 @@
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from flask import current_app, has_request_context, request
+
+from app.common import sql_events
+from app.common.paths import app_path
+
+ENVIRON_KEY = 'delivery.query_counter'
+# app frames kept per statement, innermost first
+ORIGIN_DEPTH = 3
+# characters of each statement shown in a report
+STATEMENT_WIDTH = 200
+# frames of these are never an origin
+INTERNAL_PATHS = (app_path(__file__), app_path(sql_events.__file__))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def init_query_budget(app):
+    """
+    Count the statements of every request to an endpoint with a query budget.
+
+    A resource declares one as a query_budget dict of method to the most statements it may
+    run. QUERY_BUDGET is 'raise' to fail the request, 'warn' to log a report, or 'off'.
+    """
+    if app.config.get('QUERY_BUDGET', 'off') == 'off':
+        return
+
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
+    sql_events.subscribe(_record_statement)
+
+
+class QueryCounter(object):
+    """Statements run while counting, grouped by their sql, with the app code they came from."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # statement -> [count, seconds, origins]
+        self.statements = OrderedDict()
+
+    def __len__(self):
+        return self.count
+
+    def record(self, statement, seconds, origin):
+        self.count += 1
+        self.seconds += seconds
+        group = self.statements.get(statement)
+        if group is None:
+            group = self.statements[statement] = [0, 0.0, OrderedDict()]
+        group[0] += 1
+        group[1] += seconds
+        group[2][origin] = group[2].get(origin, 0) + 1
+
+    def report(self, title='queries'):
+        lines = ['{}: {} statements in {:.1f} ms'.format(title, self.count, self.seconds * 1000)]
+        # repeated statements first, they are the likely n+1s
+        groups = sorted(self.statements.items(), key=lambda item: -item[1][0])
+        for statement, (count, seconds, origins) in groups:
+            lines.append('  {:>4}x {:>8.1f} ms  {}'.format(count, seconds * 1000, _shorten(statement)))
+            for origin, origin_count in origins.items():
+                lines.append('          {:>4}x from {}'.format(origin_count, origin or 'outside the app'))
+
+        return '\n'.join(lines)
+
+    def check(self, budget, title='queries', mode='raise'):
+        if self.count <= budget:
+            return
+
+        report = '{} over a budget of {}\n{}'.format(title, budget, self.report())
+        if mode == 'raise':
+            raise QueryBudgetExceeded(report)
+        current_app.logger.warning(report)
+
+
+@contextmanager
+def count_queries():
+    """Count the statements run by this thread in a block: with count_queries() as queries: ..."""
+    sql_events.subscribe(_record_statement)
+    counter = QueryCounter()
+    counters = _block_counters()
+    counters.append(counter)
+    try:
+        yield counter
+    finally:
+        counters.remove(counter)
+
+
+def endpoint_budget():
+    # flask-restful keeps the resource class on the view function
+    view = current_app.view_functions.get(request.endpoint)
+    budgets = getattr(getattr(view, 'view_class', None), 'query_budget', None) or {}
+    return budgets.get(request.method)
+
+
+def _start_request():
+    budget = endpoint_budget()
+    if budget is not None:
+        request.environ[ENVIRON_KEY] = (QueryCounter(), budget)
+
+
+def _finish_request(exception=None):
+    counted = request.environ.pop(ENVIRON_KEY, None)
+    if counted is None or exception is not None:
+        return
+
+    counter, budget = counted
+    title = '{} {}'.format(request.method, request.endpoint)
+    counter.check(budget, title, current_app.config.get('QUERY_BUDGET'))
+
+
+_local = threading.local()
+
+
+def _block_counters():
+    if not hasattr(_local, 'counters'):
+        _local.counters = []
+    return _local.counters
+
+
+def _active_counters():
+    counters = list(getattr(_local, 'counters', ()))
+    if has_request_context():
+        counted = request.environ.get(ENVIRON_KEY)
+        if counted is not None:
+            counters.append(counted[0])
+    return counters
+
+
+def _origin():
+    # the innermost app frames below the statement
+    frames = []
+    frame = sys._getframe(2)
+    while frame is not None and len(frames) < ORIGIN_DEPTH:
+        path = app_path(frame.f_code.co_filename)
+        if path is not None and path not in INTERNAL_PATHS:
+            frames.append('{}:{} in {}'.format(path, frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+
+    return ' < '.join(frames)
+
+
+def _shorten(statement):
+    statement = ' '.join(statement.split())
+    if len(statement) > STATEMENT_WIDTH:
+        return statement[:STATEMENT_WIDTH - 3] + '...'
+    return statement
+
+
+def _record_statement(conn, statement, parameters, seconds, executemany):
+    counters = _active_counters()
+    if not counters:
+        return
+
+    origin = _origin()
+    for counter in counters:
+        counter.record(statement, seconds, origin)
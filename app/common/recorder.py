@@ -0,0 +1,48 @@
+import json
+import threading
+import time
+
+from flask import request
+
+# request headers that change what a replayed request does
+RECORDED_HEADERS = ('Accept', 'If-None-Match', 'If-Modified-Since', 'X-Read-Primary')
+
+
+def init_request_recorder(app):
+    """Append every request to REQUEST_LOG_PATH as a line of json, if it is set."""
+    path = app.config.get('REQUEST_LOG_PATH')
+    if path:
+        RequestRecorder(path).init_app(app)
+
+
+class RequestRecorder(object):
+    """
+    Writes one json object per request: ts, method, path, query, body, headers and endpoint.
+
+    The file is opened in append mode and every line is written under a lock in a single
+    write, so several threads (or processes, for lines under the pipe buffer size) can share it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def init_app(self, app):
+        app.before_request(self.record)
+
+    def record(self):
+        line = json.dumps({
+            'ts': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'query': request.query_string.decode('latin-1'),
+            'body': request.get_json(silent=True),
+            'headers': {name: request.headers[name] for name in RECORDED_HEADERS if name in request.headers},
+            'endpoint': request.endpoint,
+        }, sort_keys=True) + '\n'
+
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', buffering=1)
+            self._file.write(line)
@@ -0,0 +1,92 @@
+import os
+import random
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy, get_state
+from sqlalchemy import event, exc, orm
+from sqlalchemy.sql.expression import UpdateBase
+
+# clients send this with a truthy value to read what they just wrote
+READ_PRIMARY_HEADER = 'X-Read-Primary'
+
+
+def read_from_replica():
+    """Send the rest of this request's reads to a read replica, unless the client asked for the primary."""
+    replica_binds = current_app.config.get('READ_REPLICA_BINDS')
+    if not replica_binds or request.headers.get(READ_PRIMARY_HEADER) in ('1', 'true'):
+        return
+
+    # one replica per request, so a request sees a single snapshot
+    g.read_replica_bind = random.choice(replica_binds)
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, e.g. right after a write made by another session."""
+    replica_bind = g.pop('read_replica_bind', None)
+    try:
+        yield
+    finally:
+        if replica_bind is not None:
+            g.read_replica_bind = replica_bind
+
+
+class RoutingSession(SignallingSession):
+    """
+    A session that reads from the request's replica and writes to the primary.
+
+    Once the session has flushed or run an INSERT, UPDATE or DELETE everything after it
+    goes to the primary, so a request always reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None):
+        if isinstance(clause, UpdateBase) or _has_lock(clause):
+            self.info['wrote'] = True
+
+        replica_bind = self._replica_bind()
+        if replica_bind is not None:
+            return get_state(self.app).db.get_engine(self.app, bind=replica_bind)
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+    def _replica_bind(self):
+        if not has_app_context() or self.info.get('wrote') or self._flushing:
+            return None
+        if self.new or self.dirty or self.deleted:
+            return None
+        return g.get('read_replica_bind')
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info['wrote'] = True
+
+
+def _has_lock(clause):
+    # SELECT ... FOR UPDATE has to run where the following write does
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def create_engine(self, sa_url, engine_opts):
+        engine = super(RoutingSQLAlchemy, self).create_engine(sa_url, engine_opts)
+        event.listen(engine, 'connect', _remember_pid)
+        event.listen(engine, 'checkout', _discard_if_forked)
+        return engine
+
+
+def _remember_pid(dbapi_connection, connection_record):
+    connection_record.info['pid'] = os.getpid()
+
+
+def _discard_if_forked(dbapi_connection, connection_record, connection_proxy):
+    # a connection opened before a fork shares its socket with the parent. it is dropped
+    # without being closed, closing it would end the parent's session, and the pool connects again
+    pid = os.getpid()
+    if connection_record.info['pid'] != pid:
+        connection_record.connection = connection_proxy.connection = None
+        raise exc.DisconnectionError('Connection record belongs to pid {}, attempting to check out in pid {}'.format(
+            connection_record.info['pid'], pid))
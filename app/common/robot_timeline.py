@@ -0,0 +1,147 @@
+import threading
+from bisect import bisect_right
+from datetime import timezone
+
+from flask import current_app
+
+
+def timeline_index_enabled():
+    return current_app.config.get('ROBOT_TIMELINE_INDEX', False)
+
+
+def _naive_utc(ts):
+    # robot_route timestamps come back from the db naive, but are created aware
+    if ts is not None and ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+class RobotTimeline(object):
+    """
+    A robot's robot routes kept sorted by start_ts.
+
+    A robot is only ever on one route at a time, so robot routes never overlap and
+    the latest one starting at or before a timestamp is the only candidate for it.
+    """
+
+    def __init__(self, robot_routes=()):
+        self._starts = []
+        self._robot_routes = []
+        self._lock = threading.Lock()
+        for robot_route_id, start_ts, end_ts, route_id in robot_routes:
+            self.add(robot_route_id, start_ts, end_ts, route_id)
+
+    def __len__(self):
+        return len(self._robot_routes)
+
+    def add(self, robot_route_id, start_ts, end_ts, route_id):
+        start_ts = _naive_utc(start_ts)
+        with self._lock:
+            i = bisect_right(self._starts, start_ts)
+            self._starts.insert(i, start_ts)
+            self._robot_routes.insert(i, [robot_route_id, start_ts, _naive_utc(end_ts), route_id])
+
+    def end(self, robot_route_id, end_ts):
+        # the robot route being ended is almost always the latest one
+        with self._lock:
+            for robot_route in reversed(self._robot_routes):
+                if robot_route[0] == robot_route_id:
+                    robot_route[2] = _naive_utc(end_ts)
+                    return
+
+    def route_id_at(self, ts):
+        ts = _naive_utc(ts)
+        with self._lock:
+            i = bisect_right(self._starts, ts) - 1
+            if i < 0:
+                return None
+            _, _, end_ts, route_id = self._robot_routes[i]
+
+        # half open, like RobotRoute.active_at
+        if end_ts is not None and end_ts <= ts:
+            return None
+        return route_id
+
+    def route_ids_in_range(self, start_ts, end_ts):
+        start_ts = _naive_utc(start_ts)
+        end_ts = _naive_utc(end_ts)
+
+        with self._lock:
+            lo = bisect_right(self._starts, start_ts) - 1
+            if lo < 0:
+                lo = 0
+            elif self._robot_routes[lo][2] is not None and self._robot_routes[lo][2] < start_ts:
+                # the robot route starting before the range also ended before it
+                lo += 1
+            hi = bisect_right(self._starts, end_ts)
+            robot_routes = self._robot_routes[lo:hi]
+
+        # in order of first use, the set keeps each check constant time on long histories
+        route_ids = []
+        seen = set()
+        for robot_route in robot_routes:
+            route_id = robot_route[3]
+            if route_id not in seen:
+                seen.add(route_id)
+                route_ids.append(route_id)
+        return route_ids
+
+
+class RobotTimelineIndex(object):
+    """
+    In-process cache of robot timelines, loaded per robot on first lookup.
+
+    Only timelines that are already loaded are patched, so a robot's timeline is
+    always either complete or absent. Each process keeps its own index, writes
+    made by other processes are not seen.
+    """
+
+    def __init__(self):
+        self._timelines = {}
+        # robot_id -> writes seen for the robot, loaded or not
+        self._generations = {}
+        self._lock = threading.RLock()
+
+    def get(self, robot_id):
+        return self._timelines.get(robot_id)
+
+    def generation(self, robot_id):
+        return self._generations.get(robot_id, 0)
+
+    def load(self, robot_id, robot_routes, generation=None):
+        # robot_routes read after generation(robot_id) returned generation may miss a write
+        # that came in since. then the timeline answers this lookup but is not kept
+        timeline = RobotTimeline(robot_routes)
+        with self._lock:
+            if generation is None or self.generation(robot_id) == generation:
+                self._timelines[robot_id] = timeline
+        return timeline
+
+    def add(self, robot_id, robot_route_id, start_ts, end_ts, route_id):
+        with self._lock:
+            self._changed(robot_id)
+            timeline = self._timelines.get(robot_id)
+        if timeline is not None:
+            timeline.add(robot_route_id, start_ts, end_ts, route_id)
+
+    def end(self, robot_id, robot_route_id, end_ts):
+        with self._lock:
+            self._changed(robot_id)
+            timeline = self._timelines.get(robot_id)
+        if timeline is not None:
+            timeline.end(robot_route_id, end_ts)
+
+    def drop(self, robot_id):
+        with self._lock:
+            self._changed(robot_id)
+            self._timelines.pop(robot_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._timelines.clear()
+
+    def _changed(self, robot_id):
+        self._generations[robot_id] = self._generations.get(robot_id, 0) + 1
+
+
+robot_timelines = RobotTimelineIndex()
@@ -0,0 +1,109 @@
+import json
+import logging
+import random
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+
+from app.common import sql_events
+
+EXPLAIN = 'EXPLAIN (ANALYZE, BUFFERS) '
+# characters of each bound parameter written, route geometries run to megabytes
+PARAMETER_WIDTH = 200
+
+
+def init_slow_query_log(app):
+    """Write statements slower than SLOW_QUERY_THRESHOLD_MS to SLOW_QUERY_LOG_PATH, if it is set."""
+    path = app.config.get('SLOW_QUERY_LOG_PATH')
+    if path:
+        SlowQueryLog(
+            path,
+            threshold_ms=app.config.get('SLOW_QUERY_THRESHOLD_MS', 500),
+            sample_rate=app.config.get('SLOW_QUERY_SAMPLE_RATE', 0.1),
+            max_bytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024),
+            backup_count=app.config.get('SLOW_QUERY_LOG_BACKUP_COUNT', 5),
+        ).listen()
+
+
+class SlowQueryLog(object):
+    """
+    Writes one json object per captured statement: ts, ms, endpoint, statement, parameters and plan.
+
+    Only a sample_rate fraction of the statements over the threshold are captured. The plan of a
+    SELECT comes from running it again under EXPLAIN (ANALYZE, BUFFERS) on the same connection,
+    in a savepoint, so a failed EXPLAIN leaves the transaction usable. Other statements are
+    written without a plan, running them again would repeat their writes.
+    """
+
+    def __init__(self, path, threshold_ms=500, sample_rate=0.1, max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.threshold = threshold_ms / 1000.0
+        self.sample_rate = sample_rate
+        # handle() takes the handler's lock and rotates the file when it is full
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+
+    def listen(self):
+        sql_events.subscribe(self._observe_statement)
+        return self
+
+    def close(self):
+        sql_events.unsubscribe(self._observe_statement)
+        self.handler.close()
+
+    def capture(self, conn, statement, parameters, seconds, executemany=False):
+        plan = None
+        if not executemany and conn.dialect.name == 'postgresql' and _is_select(statement):
+            plan = explain(conn.connection, statement, parameters)
+
+        line = json.dumps({
+            'ts': time.time(),
+            'ms': round(seconds * 1000, 3),
+            'endpoint': request.endpoint if has_request_context() else None,
+            'statement': statement,
+            'parameters': _format_parameters(parameters),
+            'plan': plan,
+        }, sort_keys=True)
+        self.handler.handle(logging.makeLogRecord({'msg': line}))
+
+    def _observe_statement(self, conn, statement, parameters, seconds, executemany):
+        if seconds >= self.threshold and random.random() < self.sample_rate:
+            self.capture(conn, statement, parameters, seconds, executemany)
+
+
+def explain(dbapi_connection, statement, parameters):
+    # a cursor of the dbapi connection, so the EXPLAIN is not itself seen by engine events
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute('SAVEPOINT slow_query_plan')
+        try:
+            cursor.execute(EXPLAIN + statement, parameters)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT slow_query_plan')
+            return 'EXPLAIN failed: {}'.format(e)
+        cursor.execute('RELEASE SAVEPOINT slow_query_plan')
+        return plan
+    except Exception as e:
+        return 'EXPLAIN failed: {}'.format(e)
+    finally:
+        cursor.close()
+
+
+def _is_select(statement):
+    words = statement.lstrip().split(None, 1)
+    return bool(words) and words[0].upper() == 'SELECT'
+
+
+def _format_parameters(parameters):
+    def short(value):
+        value = value if isinstance(value, (int, float, bool, type(None))) else str(value)
+        if isinstance(value, str) and len(value) > PARAMETER_WIDTH:
+            return value[:PARAMETER_WIDTH - 3] + '...'
+        return value
+
+    if isinstance(parameters, dict):
+        return {key: short(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_format_parameters(value) if isinstance(value, (dict, list, tuple)) else short(value)
+                for value in parameters]
+    return short(parameters)
@@ -0,0 +1,131 @@
+import math
+import threading
+
+from flask import current_app
+
+# mean earth radius in meters, as used by PostGIS for sphere distances on geographies
+EARTH_RADIUS = 6371008.7714
+
+
+def spatial_index_enabled():
+    return current_app.config.get('DOCKING_STATION_SPATIAL_INDEX', False)
+
+
+def sphere_distance(longitude_1, latitude_1, longitude_2, latitude_2):
+    # haversine distance in meters
+    lon_1, lat_1, lon_2, lat_2 = map(math.radians, (longitude_1, latitude_1, longitude_2, latitude_2))
+    a = math.sin((lat_2 - lat_1) / 2) ** 2 + \
+        math.cos(lat_1) * math.cos(lat_2) * math.sin((lon_2 - lon_1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex(object):
+    """
+    Points bucketed into a grid of cell_size degree cells.
+
+    A radius query only measures the distance to points in the cells overlapping
+    the radius' bounding box, which stays a handful of cells for radii that are
+    small next to the cell size.
+    """
+
+    def __init__(self, cell_size=1.0):
+        self.cell_size = cell_size
+        self.loaded = False
+        self._lon_cells = int(math.ceil(360 / cell_size))
+        self._cells = {}
+        self._points = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._points)
+
+    def load(self, points):
+        with self._lock:
+            self._cells = {}
+            self._points = {}
+            for id, longitude, latitude in points:
+                self._add(id, longitude, latitude)
+            self.loaded = True
+
+    def add(self, id, longitude, latitude):
+        with self._lock:
+            self._remove(id)
+            self._add(id, longitude, latitude)
+
+    def remove(self, id):
+        with self._lock:
+            self._remove(id)
+
+    def clear(self):
+        with self._lock:
+            self._cells = {}
+            self._points = {}
+            self.loaded = False
+
+    def ids_in_radius(self, longitude, latitude, m_radius):
+        with self._lock:
+            ids = []
+            for cell in self._candidate_cells(longitude, latitude, m_radius):
+                for id, (point_longitude, point_latitude) in cell.items():
+                    if sphere_distance(longitude, latitude, point_longitude, point_latitude) <= m_radius:
+                        ids.append(id)
+
+            return ids
+
+    def _cell_key(self, longitude, latitude):
+        x = int((longitude + 180) // self.cell_size) % self._lon_cells
+        y = int((latitude + 90) // self.cell_size)
+        return x, y
+
+    def _add(self, id, longitude, latitude):
+        key = self._cell_key(longitude, latitude)
+        self._cells.setdefault(key, {})[id] = (longitude, latitude)
+        self._points[id] = key
+
+    def _remove(self, id):
+        key = self._points.pop(id, None)
+        if key is None:
+            return
+        cell = self._cells[key]
+        del cell[id]
+        if not cell:
+            del self._cells[key]
+
+    def _candidate_cells(self, longitude, latitude, m_radius):
+        angular_radius = m_radius / EARTH_RADIUS
+        lat_radius = math.degrees(angular_radius)
+        min_latitude = latitude - lat_radius
+        max_latitude = latitude + lat_radius
+
+        cos_latitude = math.cos(math.radians(latitude))
+        if min_latitude <= -90 or max_latitude >= 90 or math.sin(angular_radius) >= cos_latitude:
+            # the radius reaches a pole, so every longitude is in range
+            lon_radius = 180
+        else:
+            lon_radius = math.degrees(math.asin(math.sin(angular_radius) / cos_latitude))
+
+        min_y = self._cell_key(longitude, max(min_latitude, -90))[1]
+        max_y = self._cell_key(longitude, min(max_latitude, 90))[1]
+        if lon_radius >= 180:
+            xs = range(self._lon_cells)
+        else:
+            min_x = int((longitude - lon_radius + 180) // self.cell_size)
+            max_x = int((longitude + lon_radius + 180) // self.cell_size)
+            xs = [x % self._lon_cells for x in range(min_x, max_x + 1)]
+            # a radius wider than the grid would visit cells twice
+            xs = sorted(set(xs))
+
+        if len(xs) * (max_y - min_y + 1) > len(self._cells):
+            # cheaper to check every non-empty cell
+            return [cell for (x, y), cell in self._cells.items() if min_y <= y <= max_y]
+
+        cells = []
+        for y in range(min_y, max_y + 1):
+            for x in xs:
+                cell = self._cells.get((x, y))
+                if cell:
+                    cells.append(cell)
+        return cells
+
+
+docking_station_index = SpatialIndex()
@@ -0,0 +1,55 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+START_KEY = 'sql_events_start'
+
+# a tuple, so a statement never copies it and subscribing mid-statement is safe
+_subscribers = ()
+_listening = []
+
+
+def subscribe(callback):
+    """
+    Call callback(conn, statement, parameters, seconds, executemany) after every statement.
+
+    Each statement is timed once, however many callbacks there are. The listeners are on the
+    Engine class, so the primary and every replica engine are timed.
+    """
+    global _subscribers
+    if callback not in _subscribers:
+        _subscribers += (callback,)
+    _listen_to_engines()
+    return callback
+
+
+def unsubscribe(callback):
+    global _subscribers
+    _subscribers = tuple(subscriber for subscriber in _subscribers if subscriber != callback)
+
+
+def _listen_to_engines():
+    if _listening:
+        return
+    event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(Engine, 'handle_error', _handle_error)
+    _listening.append(True)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(START_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info[START_KEY].pop()
+    for callback in _subscribers:
+        callback(conn, statement, parameters, seconds, executemany)
+
+
+def _handle_error(exception_context):
+    # a failed statement has no after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(START_KEY):
+        connection.info[START_KEY].pop()
@@ -1,4 +1,87 @@
+import json
+import sqlalchemy as sa
+from sqlalchemy.ext import baked
+
 from app import db
+from app.common.helpers import validate_and_extract_page
+
+
+# rows per multi-row INSERT statement in create_many
+INSERT_BATCH_SIZE = 1000
+# rows fetched per round trip from the server-side cursor when streaming
+STREAM_BATCH_SIZE = 1000
+
+# hot query shapes, built and compiled once per process. pass the model class as an argument
+# to the bakery when the same lambda serves several models, it is part of the cache key
+bakery = baked.bakery(size=500)
+
+
+class Page(list):
+    """A page of instances, and the after_id of the next page if there is one."""
+
+    def __init__(self, instances, next_cursor=None):
+        super(Page, self).__init__(instances)
+        self.next_cursor = next_cursor
+
+
+def paginate(query, key, limit, after_id=None):
+    # keyset pagination, ordered by key so the key of the last instance is the next cursor
+    if after_id is not None:
+        query = query.filter(key > after_id)
+
+    rows = query.add_columns(key).order_by(None).order_by(key).limit(limit + 1).all()
+    next_cursor = rows[limit - 1][-1] if len(rows) > limit else None
+    return Page([row[0] for row in rows[:limit]], next_cursor)
+
+
+def stream(query, key, limit=None, after_id=None):
+    # iterate a server-side cursor in key order, so memory stays flat however many rows match
+    if after_id is not None:
+        query = query.filter(key > after_id)
+
+    query = query.add_columns(key).order_by(None).order_by(key)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return (row[0] for row in query.yield_per(STREAM_BATCH_SIZE))
+
+
+# a counter per versioned table, bumped in the writing transaction by a statement trigger,
+# so a collection's version is read by primary key instead of by scanning the collection
+table_versions = db.Table(
+    'table_version', db.metadata,
+    db.Column('table_name', db.Text, primary_key=True),
+    db.Column('version', db.BigInteger, nullable=False),
+)
+
+BUMP_TABLE_VERSION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_version (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_version.version + 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+TABLE_VERSION_TRIGGER = (
+    'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+    'FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()'
+)
+
+
+def versioned(table):
+    # the function is replaced with each table, so it exists whatever order tables are created in
+    sa.event.listen(table, 'after_create', sa.DDL(BUMP_TABLE_VERSION))
+    sa.event.listen(table, 'after_create', sa.DDL(TABLE_VERSION_TRIGGER.format(table=table.name)))
+    return table
+
+
+def table_version(*tables):
+    # one counter per table, 0 until the table is first written
+    rows = db.session.query(table_versions.c.table_name, table_versions.c.version) \
+        .filter(table_versions.c.table_name.in_([table.name for table in tables]))
+    versions = dict(rows.all())
+    return tuple(versions.get(table.name, 0) for table in tables)
 
 
 class Base(object):
@@ -6,13 +89,56 @@ class Base(object):
     def create(cls, *args):
         raise NotImplemented()
 
+    @classmethod
+    def create_many(cls, items):
+        raise NotImplemented()
+
+    @classmethod
+    def _insert_many(cls, rows, *returning):
+        # multi-row INSERTs in the current transaction, returning ids (or the given columns) in row order
+        table = cls.__table__
+        returning = returning or (table.c.id,)
+
+        results = []
+        for i in range(0, len(rows), INSERT_BATCH_SIZE):
+            statement = table.insert().values(rows[i:i + INSERT_BATCH_SIZE]).returning(*returning)
+            results.extend(db.session.execute(statement).fetchall())
+
+        if len(returning) == 1:
+            return [result[0] for result in results]
+        return results
+
+    @classmethod
+    def _get_many(cls, ids):
+        if not ids:
+            return []
+        return cls.query.filter(cls.id.in_(ids)).order_by(cls.id).all()
+
     @classmethod
     def get(cls, id):
-        return cls.query.get(id)
+        # the identity map first, like Query.get
+        return bakery(lambda session: session.query(cls), cls)(db.session()).get(id)
+
+    @property
+    def last_modified(self):
+        return self.modified_ts or self.created_ts
 
     @classmethod
-    def get_all(cls, query_string=None):
-        return cls.query.all()
+    def collection_version(cls, query_string=None):
+        return table_version(cls.__table__)
+
+    @classmethod
+    def get_all(cls, query_string=None, streamed=False):
+        query_string = json.loads(query_string) if query_string else {}
+        return cls._page(cls.query, cls.id, query_string, streamed)
+
+    @classmethod
+    def _page(cls, query, key, query_string, streamed=False):
+        limit, after_id = validate_and_extract_page(query_string, streamed)
+        if streamed:
+            return stream(query, key, limit, after_id)
+
+        return paginate(query, key, limit, after_id)
 
     def delete(self):
         db.session.delete(self)
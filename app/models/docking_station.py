@@ -1,12 +1,16 @@
 import datetime
 from datetime import timezone
 import json
+import sqlalchemy as sa
+from flask import current_app
 from sqlalchemy import func
 from geoalchemy2 import Geometry
 
 from app import db
-from app.common.helpers import validate_point
-from app.models.base import Base
+from app.common.helpers import MAX_PAGE_LIMIT, validate_point
+from app.common.spatial_index import docking_station_index, spatial_index_enabled
+from app.models import InvalidArguments, NotFound
+from app.models.base import Base, table_version, versioned
 from app.models.route import Route
 
 
@@ -17,8 +21,8 @@ class DockingStation(db.Model, Base):
     longitude = db.Column(db.Float, nullable=False)
     latitude = db.Column(db.Float, nullable=False)
     geo = db.Column(Geometry(geometry_type='POINT', srid=4326))
-    created_ts = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now(tz=timezone.utc))
-    modified_ts = db.Column(db.DateTime, onupdate=datetime.datetime.now(tz=timezone.utc))
+    created_ts = db.Column(db.DateTime, nullable=False, default=lambda: datetime.datetime.now(tz=timezone.utc))
+    modified_ts = db.Column(db.DateTime, onupdate=lambda: datetime.datetime.now(tz=timezone.utc))
     robots = db.relationship('Robot', backref='docking_station', lazy=True)
 
     def __repr__(self):
@@ -31,33 +35,182 @@ class DockingStation(db.Model, Base):
         docking_station = DockingStation(longitude=longitude, latitude=latitude, geo=geo)
         db.session.add(docking_station)
         db.session.commit()
+        if docking_station_index.loaded:
+            docking_station_index.add(docking_station.id, longitude, latitude)
 
         return docking_station
 
     @classmethod
-    def get_all(cls, query_string=None):
+    def create_many(cls, items):
+        # items are [longitude, latitude]
+        errors = {}
+        rows = []
+        for i, (longitude, latitude) in enumerate(items):
+            try:
+                validate_point(longitude, latitude)
+            except InvalidArguments as e:
+                errors[i] = e.args[0]
+                continue
+            rows.append({
+                'longitude': longitude,
+                'latitude': latitude,
+                'geo': 'POINT({} {})'.format(longitude, latitude)
+            })
+
+        if errors:
+            raise InvalidArguments(errors)
+
+        ids = cls._insert_many(rows)
+        db.session.commit()
+        docking_stations = cls._get_many(ids)
+        if docking_station_index.loaded:
+            for docking_station in docking_stations:
+                docking_station_index.add(docking_station.id, docking_station.longitude, docking_station.latitude)
+
+        return docking_stations
+
+    @classmethod
+    def collection_version(cls, query_string=None):
+        query_string = json.loads(query_string) if query_string else {}
+        if query_string.get('route_id'):
+            # stations near a route also change when the route does
+            return table_version(cls.__table__, Route.__table__)
+
+        return super(DockingStation, cls).collection_version(query_string)
+
+    @classmethod
+    def get_all(cls, query_string=None, streamed=False):
         query_string = json.loads(query_string) if query_string else {}
+        if 'nearest' in query_string:
+            return cls._get_all_nearest(query_string)
+
         if not query_string.get('radius'):
-            return cls.query.all()
+            return cls._page(cls.query, cls.id, query_string, streamed)
 
+        # convert nautical miles to meters
+        m_radius = query_string['radius'] * 1852
         if query_string.get('route_id'):
             route = Route.get(query_string['route_id'])
-            return cls.get_all_in_route_radius(route, query_string['radius'])
+            query = cls._in_route_radius_query(route, m_radius)
+        else:
+            longitude, latitude = query_string['target_longitude'], query_string['target_latitude']
+            query = cls._in_radius_query(longitude, latitude, m_radius)
+
+        return cls._page(query, cls.id, query_string, streamed)
+
+    @classmethod
+    def _get_all_nearest(cls, query_string):
+        k = query_string['nearest']
+        if not isinstance(k, int) or isinstance(k, bool) or k < 1:
+            raise InvalidArguments('nearest must be a positive integer')
+        if k > MAX_PAGE_LIMIT:
+            # nearest is not paged, so it is held to the largest page
+            raise InvalidArguments('nearest must be at most {}'.format(MAX_PAGE_LIMIT))
+
+        if query_string.get('route_id'):
+            route = Route.get(query_string['route_id'])
+            if not route:
+                raise NotFound({'resource_name': 'Route', 'id': query_string['route_id']})
+            return cls.get_nearest_to_route(route, k)
+
+        if query_string.get('target_longitude') is None or query_string.get('target_latitude') is None:
+            raise InvalidArguments('nearest requires route_id or target_longitude and target_latitude')
+
+        return cls.get_nearest(query_string['target_longitude'], query_string['target_latitude'], k)
+
+    @classmethod
+    def get_nearest(cls, longitude, latitude, k):
+        validate_point(longitude, latitude)
+        target_point = func.ST_GeogFromText('POINT({} {})'.format(longitude, latitude))
+        return cls._nearest(target_point, k)
+
+    @classmethod
+    def get_nearest_to_route(cls, route, k):
+        route_path = db.session.query(func.geography(Route.path)).filter(Route.id == route.id).as_scalar()
+        return cls._nearest(route_path, k)
 
-        return cls.get_all_in_radius(query_string['target_longitude'], query_string['target_latitude'], query_string['radius'])
+    @classmethod
+    def _nearest(cls, target_geography, k):
+        # <-> orders by distance with idx_docking_station_geography, reading only k stations
+        station_geography = func.geography(cls.geo)
+        m_distance = func.ST_Distance(station_geography, target_geography, False)
+        rows = db.session.query(cls, m_distance) \
+            .order_by(station_geography.op('<->')(target_geography)) \
+            .limit(k) \
+            .all()
+
+        docking_stations = []
+        for docking_station, distance in rows:
+            # convert meters to nautical miles
+            docking_station.distance = distance / 1852
+            docking_stations.append(docking_station)
+
+        return docking_stations
 
     @classmethod
     def get_all_in_route_radius(cls, route, radius):
         # convert nautical miles to meters
-        m_radius = radius * 1852
-        return cls.query.filter(func.ST_Distance_Sphere(cls.geo, route.path) <= m_radius).all()
+        return cls._in_route_radius_query(route, radius * 1852).all()
 
     @classmethod
     def get_all_in_radius(cls, longitude, latitude, radius):
         # convert nautical miles to meters
-        m_radius = radius * 1852
-        target_point = 'POINT({} {})'.format(longitude, latitude)
-        return cls.query.filter(func.ST_Distance_Sphere(cls.geo, target_point) <= m_radius).all()
+        return cls._in_radius_query(longitude, latitude, radius * 1852).all()
+
+    @classmethod
+    def _in_route_radius_query(cls, route, m_radius):
+        if current_app.config.get('ROUTE_RADIUS_BACKEND') == 'numpy':
+            return cls._with_ids(cls._ids_in_route_radius_numpy(route, m_radius))
+
+        route_path = db.session.query(func.geography(Route.path)).filter(Route.id == route.id).as_scalar()
+        return cls.query.filter(cls._within_distance(route_path, m_radius))
+
+    @classmethod
+    def _ids_in_route_radius_numpy(cls, route, m_radius):
+        from app.common.geo import DISTANCE_TOLERANCE, points_to_polyline_distances, polyline_bounding_box
+
+        route_points = route.points_array()
+        min_longitude, min_latitude, max_longitude, max_latitude = polyline_bounding_box(route_points, m_radius)
+        candidates = db.session.query(cls.id, cls.longitude, cls.latitude) \
+            .filter(cls.latitude.between(min_latitude, max_latitude))
+        if min_longitude is not None:
+            candidates = candidates.filter(cls.longitude.between(min_longitude, max_longitude))
+
+        candidates = candidates.all()
+        if not candidates:
+            return []
+
+        distances = points_to_polyline_distances([candidate[1:] for candidate in candidates], route_points)
+        return [candidate[0] for candidate, distance in zip(candidates, distances)
+                if distance <= m_radius + DISTANCE_TOLERANCE]
+
+    @classmethod
+    def _in_radius_query(cls, longitude, latitude, m_radius):
+        if spatial_index_enabled():
+            return cls._with_ids(cls.load_spatial_index().ids_in_radius(longitude, latitude, m_radius))
+
+        target_point = func.ST_GeogFromText('POINT({} {})'.format(longitude, latitude))
+        return cls.query.filter(cls._within_distance(target_point, m_radius))
+
+    @classmethod
+    def _with_ids(cls, ids):
+        if not ids:
+            return cls.query.filter(sa.false())
+        return cls.query.filter(cls.id.in_(ids))
+
+    @classmethod
+    def load_spatial_index(cls):
+        if not docking_station_index.loaded:
+            docking_station_index.load(db.session.query(cls.id, cls.longitude, cls.latitude))
+
+        return docking_station_index
+
+    @classmethod
+    def _within_distance(cls, target_geography, m_radius):
+        # ST_DWithin can use idx_docking_station_geography, where comparing
+        # ST_Distance_Sphere to the radius scans every station.
+        # use_spheroid=False measures on a sphere, like ST_Distance_Sphere
+        return func.ST_DWithin(func.geography(cls.geo), target_geography, m_radius, False)
 
     def update(self, **kwargs):
         if kwargs.get('longitude'):
@@ -71,5 +224,16 @@ class DockingStation(db.Model, Base):
 
         db.session.add(self)
         db.session.commit()
+        if docking_station_index.loaded:
+            docking_station_index.add(self.id, self.longitude, self.latitude)
 
         return self
+
+    def delete(self):
+        id = self.id
+        super(DockingStation, self).delete()
+        docking_station_index.remove(id)
+
+
+sa.Index('idx_docking_station_geography', func.geography(DockingStation.geo), postgresql_using='gist')
+versioned(DockingStation.__table__)
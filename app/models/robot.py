@@ -1,12 +1,20 @@
 import sqlalchemy as sa
+from collections import namedtuple
 from datetime import datetime, timezone
+from flask import current_app
 
 from app import db
+from app.common.robot_timeline import robot_timelines, timeline_index_enabled
 from app.models import InvalidArguments
-from app.models.base import Base
+from app.models.base import Base, bakery, versioned
 from app.models.robot_route import RobotRoute
 from app.models.route import Route
 
+# meters per second in a knot
+KNOT = 1852 / 3600.0
+
+RobotPosition = namedtuple('RobotPosition', ['robot_id', 'route_id', 'longitude', 'latitude'])
+
 
 class Robot(db.Model, Base):
     __tablename__ = 'robot'
@@ -19,8 +27,8 @@ class Robot(db.Model, Base):
     id = db.Column(db.Integer, primary_key=True)
     route_id = db.Column(db.Integer, db.ForeignKey('route.id'))
     docking_station_id = db.Column(db.Integer, db.ForeignKey('docking_station.id'))
-    created_ts = db.Column(db.DateTime, nullable=False, default=datetime.now(tz=timezone.utc))
-    modified_ts = db.Column(db.DateTime, onupdate=datetime.now(tz=timezone.utc))
+    created_ts = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(tz=timezone.utc))
+    modified_ts = db.Column(db.DateTime, onupdate=lambda: datetime.now(tz=timezone.utc))
     robot_routes = db.relationship('RobotRoute', backref='robot_route', lazy=True)
 
     def __repr__(self):
@@ -39,36 +47,57 @@ class Robot(db.Model, Base):
 
         return robot
 
+    @classmethod
+    def create_many(cls, items):
+        from app.models.docking_station import DockingStation
 
-    def _is_ts_within_robot_route_range(self, robot_route, ts):
-        if robot_route.end_ts:
-            if robot_route.start_ts <= ts <= robot_route.end_ts:
-                return True
-        else:
-            # robot route has not finished
-            if robot_route.start_ts <= ts:
-                return True
-        return False
-
-    def _does_ts_range_overlap_robot_route(self, robot_route, start_ts, end_ts):
-        if self._is_ts_within_robot_route_range(robot_route, start_ts):
-            return True
-        elif self._is_ts_within_robot_route_range(robot_route, end_ts):
-            return True
-        elif (start_ts <= robot_route.start_ts):
-            if robot_route.end_ts and (end_ts >= robot_route.end_ts):
-                return True
-            elif not robot_route.end_ts and (robot_route.start_ts < end_ts):
-                return True
-
-        return False
+        # items are [route_id, docking_station_id]
+        route_ids = {route_id for route_id, _ in items if route_id}
+        docking_station_ids = {docking_station_id for _, docking_station_id in items if docking_station_id}
+        existing_route_ids = cls._existing_ids(Route, route_ids)
+        existing_docking_station_ids = cls._existing_ids(DockingStation, docking_station_ids)
+
+        errors = {}
+        rows = []
+        for i, (route_id, docking_station_id) in enumerate(items):
+            if (route_id and docking_station_id) or (not route_id and not docking_station_id):
+                errors[i] = 'Robot must have route_id or docking_station_id'
+            elif route_id and route_id not in existing_route_ids:
+                errors[i] = 'Route {} could not be found'.format(route_id)
+            elif docking_station_id and docking_station_id not in existing_docking_station_ids:
+                errors[i] = 'DockingStation {} could not be found'.format(docking_station_id)
+            else:
+                rows.append({'route_id': route_id, 'docking_station_id': docking_station_id})
+
+        if errors:
+            raise InvalidArguments(errors)
+
+        table = cls.__table__
+        robots = cls._insert_many(rows, table.c.id, table.c.route_id, table.c.created_ts)
+        robot_routes = [
+            {'robot_id': id, 'route_id': route_id, 'start_ts': created_ts}
+            for id, route_id, created_ts in robots if route_id
+        ]
+        if robot_routes:
+            RobotRoute._insert_many(robot_routes)
+        db.session.commit()
+
+        return cls._get_many([robot[0] for robot in robots])
+
+    @staticmethod
+    def _existing_ids(model_cls, ids):
+        if not ids:
+            return set()
+        return {id for id, in db.session.query(model_cls.id).filter(model_cls.id.in_(ids))}
 
     def delete(self):
-        for robot_route in self.robot_routes:
-            robot_route.delete()
+        # the whole history in one statement, rather than a delete and a commit per robot route
+        RobotRoute.query.filter(RobotRoute.robot_id == self.id).delete(synchronize_session=False)
+        db.session.expire(self, ['robot_routes'])
 
         db.session.delete(self)
         db.session.commit()
+        robot_timelines.drop(self.id)
 
     def update(self, route_id=None, docking_station_id=None):
         if (route_id and docking_station_id) or (not route_id and not docking_station_id):
@@ -77,11 +106,13 @@ class Robot(db.Model, Base):
         if route_id and (route_id == self.route_id):
             return self
 
-        self._end_current_route()
+        # the next robot route starts as the current one ends, see RobotRoute.active_at
+        now = datetime.now(tz=timezone.utc)
+        self._end_current_route(now)
         if route_id:
             self.route_id = route_id
             self.docking_station_id = None
-            RobotRoute.create(self.id, route_id, datetime.now(tz=timezone.utc))
+            RobotRoute.create(self.id, route_id, now)
         elif docking_station_id:
             self.docking_station_id = docking_station_id
             self.route_id = None
@@ -89,6 +120,129 @@ class Robot(db.Model, Base):
         db.session.add(self)
         db.session.commit()
 
+    @classmethod
+    def reassign_many(cls, moves):
+        """
+        Move robots to routes or docking stations in one transaction with set-based statements.
+
+        moves are dicts of robot_id and one of route_id or docking_station_id. Returns a result
+        per move, in order, with a status of moved, unchanged or error.
+        """
+        from app.models.docking_station import DockingStation
+
+        robot_ids = {move['robot_id'] for move in moves}
+        current_route_ids = dict(
+            db.session.query(cls.id, cls.route_id).filter(cls.id.in_(robot_ids)).with_for_update()
+        ) if robot_ids else {}
+        existing_route_ids = cls._existing_ids(Route, {move.get('route_id') for move in moves} - {None})
+        existing_docking_station_ids = cls._existing_ids(
+            DockingStation, {move.get('docking_station_id') for move in moves} - {None})
+
+        results = []
+        changes = {}
+        for move in moves:
+            robot_id = move['robot_id']
+            route_id = move.get('route_id')
+            docking_station_id = move.get('docking_station_id')
+            result = {'robot_id': robot_id, 'route_id': route_id, 'docking_station_id': docking_station_id}
+            results.append(result)
+
+            if (route_id and docking_station_id) or (not route_id and not docking_station_id):
+                result.update(status='error', error='Robot must have route_id or docking_station_id')
+            elif robot_id not in current_route_ids:
+                result.update(status='error', error='Robot {} could not be found'.format(robot_id))
+            elif robot_id in changes:
+                result.update(status='error', error='Robot {} is moved more than once'.format(robot_id))
+            elif route_id and route_id not in existing_route_ids:
+                result.update(status='error', error='Route {} could not be found'.format(route_id))
+            elif docking_station_id and docking_station_id not in existing_docking_station_ids:
+                result.update(status='error', error='DockingStation {} could not be found'.format(docking_station_id))
+            elif route_id and route_id == current_route_ids[robot_id]:
+                result.update(status='unchanged')
+            else:
+                result.update(status='moved')
+                changes[robot_id] = (route_id, docking_station_id)
+
+        if not changes:
+            db.session.commit()
+            return results
+
+        now = datetime.now(tz=timezone.utc)
+        robot_route_table = RobotRoute.__table__
+        robot_table = cls.__table__
+
+        leaving_route_ids = [robot_id for robot_id in changes if current_route_ids[robot_id]]
+        ended_robot_routes = []
+        if leaving_route_ids:
+            ended_robot_routes = db.session.execute(
+                robot_route_table.update()
+                .where(robot_route_table.c.robot_id.in_(leaving_route_ids))
+                .where(robot_route_table.c.end_ts.is_(None))
+                .values(end_ts=now)
+                .returning(robot_route_table.c.id, robot_route_table.c.robot_id)
+            ).fetchall()
+
+        new_robot_routes = [
+            {'robot_id': robot_id, 'route_id': route_id, 'start_ts': now}
+            for robot_id, (route_id, _) in changes.items() if route_id
+        ]
+        started_robot_routes = []
+        if new_robot_routes:
+            started_robot_routes = RobotRoute._insert_many(
+                new_robot_routes, robot_route_table.c.id, robot_route_table.c.robot_id, robot_route_table.c.route_id)
+
+        route_ids = {robot_id: route_id for robot_id, (route_id, _) in changes.items()}
+        docking_station_ids = {robot_id: docking_station_id for robot_id, (_, docking_station_id) in changes.items()}
+        db.session.execute(
+            robot_table.update()
+            .where(robot_table.c.id.in_(list(changes)))
+            .values(
+                route_id=_case_by_robot_id(robot_table, route_ids),
+                docking_station_id=_case_by_robot_id(robot_table, docking_station_ids)
+            )
+        )
+        db.session.commit()
+
+        for robot_route_id, robot_id in ended_robot_routes:
+            robot_timelines.end(robot_id, robot_route_id, now)
+        for robot_route_id, robot_id, route_id in started_robot_routes:
+            robot_timelines.add(robot_id, robot_route_id, now, None, route_id)
+
+        return results
+
+    @classmethod
+    def positions_at_ts(cls, ts, speed_knots=None):
+        """
+        Estimated position of every robot on a route at ts, as RobotPositions in robot_id order.
+
+        A robot is taken to leave the first point of its route at the start_ts of its robot route
+        and to move along it at speed_knots, ROBOT_SPEED_KNOTS by default, until its last point.
+        The routes are read in one query and every position is interpolated in one numpy pass.
+        """
+        import numpy as np
+        from app.common.geo import interpolate_along_polylines, unpack_points
+
+        if speed_knots is None:
+            speed_knots = current_app.config['ROBOT_SPEED_KNOTS']
+
+        assignments = RobotRoute.get_assignments_at_ts(ts).all()
+        if not assignments:
+            return []
+
+        robot_ids, route_ids, start_ts = zip(*assignments)
+        routes = db.session.query(Route.id, Route.points).filter(Route.id.in_(set(route_ids))).all()
+        route_indexes = {route_id: i for i, (route_id, _) in enumerate(routes)}
+
+        # start_ts and ts are naive utc
+        elapsed = (np.datetime64(ts, 'us') - np.array(start_ts, dtype='datetime64[us]')) / np.timedelta64(1, 's')
+        positions = interpolate_along_polylines(
+            [unpack_points(points) for _, points in routes],
+            [route_indexes[route_id] for route_id in route_ids],
+            elapsed * speed_knots * KNOT)
+
+        return [RobotPosition(robot_id, route_id, longitude, latitude)
+                for robot_id, route_id, (longitude, latitude) in zip(robot_ids, route_ids, positions.tolist())]
+
     def current_robot_route(self):
         for robot_route in self.robot_routes:
             if not robot_route.end_ts:
@@ -97,26 +251,91 @@ class Robot(db.Model, Base):
         return None
 
     def find_route_by_ts(self, ts):
-        for robot_route in self.robot_routes:
-            if self._is_ts_within_robot_route_range(robot_route, ts):
-                return [Route.get(robot_route.route_id)]
+        if timeline_index_enabled():
+            route_id = self._timeline().route_id_at(ts)
+            route = Route.get(route_id) if route_id else None
+        else:
+            route = self._route_at_ts_baked(ts).first()
 
-        return []
+        return [route] if route else []
 
     def find_routes_by_ts_range(self, start_ts=None, end_ts=None):
         start_ts = start_ts or datetime(1970, 1, 1)
         end_ts = end_ts or datetime.now(tz=timezone.utc)
 
-        routes = []
-        for robot_route in self.robot_routes:
-            if self._does_ts_range_overlap_robot_route(robot_route, start_ts, end_ts):
-                routes.append(Route.get(robot_route.route_id))
+        if timeline_index_enabled():
+            route_ids = self._timeline().route_ids_in_range(start_ts, end_ts)
+            if not route_ids:
+                return []
+            routes = {route.id: route for route in Route.query.filter(Route.id.in_(route_ids))}
+            return [routes[route_id] for route_id in route_ids if route_id in routes]
+
+        return _first_uses(self._routes_in_ts_range_baked(start_ts, end_ts))
+
+    def _timeline(self):
+        timeline = robot_timelines.get(self.id)
+        if timeline is None:
+            # taken before the rows are read, so a write in between keeps the timeline out of the index
+            generation = robot_timelines.generation(self.id)
+            robot_routes = db.session.query(
+                RobotRoute.id, RobotRoute.start_ts, RobotRoute.end_ts, RobotRoute.route_id
+            ).filter(RobotRoute.robot_id == self.id)
+            timeline = robot_timelines.load(self.id, robot_routes, generation)
 
-        return routes
+        return timeline
 
-    def _end_current_route(self):
+    def routes_in_ts_range_query(self, start_ts=None, end_ts=None):
+        # one route per overlapping robot route, resolved by the
+        # (robot_id, start_ts, end_ts) index rather than the robot's whole history
+        start_ts = start_ts or datetime(1970, 1, 1)
+        end_ts = end_ts or datetime.now(tz=timezone.utc)
+
+        return Route.query \
+            .join(RobotRoute, RobotRoute.route_id == Route.id) \
+            .filter(RobotRoute.robot_id == self.id) \
+            .filter(RobotRoute.overlapping(start_ts, end_ts)) \
+            .order_by(RobotRoute.start_ts)
+
+    def _routes_in_ts_range_baked(self, start_ts, end_ts):
+        # routes_in_ts_range_query from the baked query cache, for the unpaged lookups
+        query = bakery(lambda session: session.query(Route)
+                       .join(RobotRoute, RobotRoute.route_id == Route.id)
+                       .filter(RobotRoute.robot_id == sa.bindparam('robot_id'))
+                       .filter(RobotRoute.overlapping(sa.bindparam('start_ts'), sa.bindparam('end_ts')))
+                       .order_by(RobotRoute.start_ts))
+        return query(db.session()).params(robot_id=self.id, start_ts=start_ts, end_ts=end_ts)
+
+    def _route_at_ts_baked(self, ts):
+        # the route of the one robot route active at ts, the same one RobotTimeline.route_id_at finds
+        query = bakery(lambda session: session.query(Route)
+                       .join(RobotRoute, RobotRoute.route_id == Route.id)
+                       .filter(RobotRoute.robot_id == sa.bindparam('robot_id'))
+                       .filter(RobotRoute.active_at(sa.bindparam('ts'))))
+        return query(db.session()).params(robot_id=self.id, ts=ts)
+
+    def _end_current_route(self, end_ts):
         if not self.route_id:
             return
         # end current robot_route
         robot_route = self.current_robot_route()
-        robot_route.update(datetime.now(tz=timezone.utc))
+        robot_route.update(end_ts)
+
+
+def _first_uses(routes):
+    # a route can be in a robot's history more than once, like RobotTimeline.route_ids_in_range
+    # keep each at its first use
+    unique_routes = []
+    seen = set()
+    for route in routes:
+        if route.id not in seen:
+            seen.add(route.id)
+            unique_routes.append(route)
+    return unique_routes
+
+
+def _case_by_robot_id(robot_table, values):
+    # postgres types a CASE of only NULLs as text, which an integer column will not take
+    return sa.cast(sa.case(values, value=robot_table.c.id), sa.Integer)
+
+
+versioned(Robot.__table__)
@@ -1,10 +1,17 @@
+import sqlalchemy as sa
+
 from app import db
-from app.models.base import Base
+from app.common.robot_timeline import robot_timelines
+from app.models.base import Base, versioned
 
 
 class RobotRoute(db.Model, Base):
     __tablename__ = 'robot_route'
 
+    __table_args__ = (
+        sa.Index('idx_robot_route_robot_id_start_ts_end_ts', 'robot_id', 'start_ts', 'end_ts'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     route_id = db.Column(db.Integer, db.ForeignKey('route.id'), nullable=False)
     robot_id = db.Column(db.Integer, db.ForeignKey('robot.id'), nullable=False)
@@ -19,12 +26,45 @@ class RobotRoute(db.Model, Base):
         robot_route = RobotRoute(robot_id=robot_id, route_id=route_id, start_ts=start_ts)
         db.session.add(robot_route)
         db.session.commit()
+        robot_timelines.add(robot_id, robot_route.id, start_ts, None, route_id)
 
         return robot_route
 
+    @classmethod
+    def get_assignments_at_ts(cls, ts):
+        # robot_id, route_id and start_ts of every robot on a route at ts, streamed from the db in batches
+        return db.session.query(cls.robot_id, cls.route_id, cls.start_ts) \
+            .filter(cls.active_at(ts)) \
+            .order_by(cls.robot_id) \
+            .yield_per(1000)
+
+    @classmethod
+    def active_at(cls, ts):
+        # half open, so a robot route ended at ts has already given way to the one started at ts
+        return sa.and_(
+            cls.start_ts <= ts,
+            sa.or_(cls.end_ts.is_(None), cls.end_ts > ts)
+        )
+
+    @classmethod
+    def overlapping(cls, start_ts, end_ts):
+        # an unfinished robot route is open ended
+        return sa.and_(
+            cls.start_ts <= end_ts,
+            sa.or_(cls.end_ts.is_(None), cls.end_ts >= start_ts)
+        )
+
+    def delete(self):
+        super(RobotRoute, self).delete()
+        robot_timelines.drop(self.robot_id)
+
     def update(self, end_ts):
         self.end_ts = end_ts
         db.session.add(self)
         db.session.commit()
+        robot_timelines.end(self.robot_id, self.id, end_ts)
 
         return self
+
+
+versioned(RobotRoute.__table__)
@@ -5,42 +5,84 @@ import sqlalchemy as sa
 from geoalchemy2 import Geometry
 
 from app import db
-from app.common.helpers import validate_point, validate_and_extract_datetimes
-from app.models import NotFound
-from app.models.base import Base
+from app.common.helpers import validate_and_extract_datetimes, validate_and_extract_page
+from app.models import InvalidArguments, NotFound
+from app.models.base import Base, paginate, stream, table_version, versioned
 
 
 class Route(db.Model, Base):
     __tablename__ = 'route'
 
     id = db.Column(db.Integer, primary_key=True)
-    points = db.Column(db.Text, nullable=False)
+    # packed [[longitude, latitude], ...], see app.common.geo.pack_points
+    points = db.Column(db.LargeBinary, nullable=False)
     path = db.Column(Geometry(geometry_type='LINESTRING', srid=4326), nullable=False)
-    created_ts = db.Column(db.DateTime, nullable=False, default=datetime.datetime.now(tz=timezone.utc))
-    modified_ts = db.Column(db.DateTime, onupdate=datetime.datetime.now(tz=timezone.utc))
+    created_ts = db.Column(db.DateTime, nullable=False, default=lambda: datetime.datetime.now(tz=timezone.utc))
+    modified_ts = db.Column(db.DateTime, onupdate=lambda: datetime.datetime.now(tz=timezone.utc))
     robots = db.relationship('Robot', backref='robot', lazy=True)
 
     def __repr__(self):
-        return "<Route {} points={}>".format(self.id, self.points)
+        return "<Route {} points={}>".format(self.id, len(self.points) // 16)
 
     @classmethod
     def create(cls, points):
-        geo_points = cls._calculate_geo_points(points)
-        path = sa.func.ST_MakeLine(geo_points)
+        from app.common.geo import linestring_ewkb, pack_points, validate_points
 
-        route = Route(path=path, points=json.dumps(geo_points))
+        points = validate_points(points)
+        # the path is sent as one binary parameter rather than a WKT string per point
+        path = sa.func.ST_GeomFromEWKB(linestring_ewkb(points))
+
+        route = Route(path=path, points=pack_points(points))
         db.session.add(route)
         db.session.commit()
 
         return route
 
     @classmethod
-    def get_all(cls, query_string=None):
+    def create_many(cls, items):
+        from app.common.geo import linestring_ewkb, pack_points, validate_points
+
+        # items are [points]
+        errors = {}
+        rows = []
+        for i, (points,) in enumerate(items):
+            try:
+                points = validate_points(points)
+            except InvalidArguments as e:
+                errors[i] = e.args[0]
+                continue
+            rows.append({
+                'path': sa.func.ST_GeomFromEWKB(linestring_ewkb(points)),
+                'points': pack_points(points)
+            })
+
+        if errors:
+            raise InvalidArguments(errors)
+
+        ids = cls._insert_many(rows)
+        db.session.commit()
+
+        return cls._get_many(ids)
+
+    @classmethod
+    def collection_version(cls, query_string=None):
+        from app.models.robot_route import RobotRoute
+
+        query_string = json.loads(query_string) if query_string else {}
+        if query_string.get('robot_id'):
+            # route history also changes when robots start or end routes
+            return table_version(cls.__table__, RobotRoute.__table__)
+
+        return super(Route, cls).collection_version(query_string)
+
+    @classmethod
+    def get_all(cls, query_string=None, streamed=False):
         from app.models.robot import Robot
+        from app.models.robot_route import RobotRoute
 
         query_string = json.loads(query_string) if query_string else {}
         if not query_string.get('robot_id'):
-            return cls.query.all()
+            return cls._page(cls.query, cls.id, query_string, streamed)
 
         robot = Robot.get(query_string.get('robot_id'))
         if not robot:
@@ -49,27 +91,30 @@ class Route(db.Model, Base):
         target_dt, start_dt, end_dt = validate_and_extract_datetimes(query_string)
 
         if target_dt:
-            robot.find_route_by_ts(target_dt)
+            # the robot is on at most one route at a time
+            return robot.find_route_by_ts(target_dt)
+
+        limit, after_id = validate_and_extract_page(query_string, streamed)
+        if streamed:
+            return stream(robot.routes_in_ts_range_query(start_dt, end_dt), RobotRoute.id, limit, after_id)
+
+        # a route can be in a robot's history more than once, so page by robot route
+        return paginate(robot.routes_in_ts_range_query(start_dt, end_dt), RobotRoute.id, limit, after_id)
 
-        return robot.find_routes_by_ts_range(start_ts=start_dt, end_ts=end_dt)
+    def points_array(self):
+        from app.common.geo import unpack_points
+
+        return unpack_points(self.points)
 
     def update(self, points):
-        geo_points = self._calculate_geo_points(points)
-        new_path = sa.func.ST_MakeLine(geo_points)
-        self.path = new_path
-        self.points = geo_points
+        from app.common.geo import linestring_ewkb, pack_points, validate_points
+
+        points = validate_points(points)
+        self.path = sa.func.ST_GeomFromEWKB(linestring_ewkb(points))
+        self.points = pack_points(points)
 
         db.session.add(self)
         db.session.commit()
 
-    @staticmethod
-    def _calculate_geo_points(points):
-        geos = []
-        # points = [[longitude, latitude], [longitude, latitude]]
-        for point in points:
-            longitude = point[0]
-            latitude = point[1]
-            validate_point(longitude, latitude)
-            geos.append('POINT({} {})'.format(longitude, latitude))
-
-        return geos
+
+versioned(Route.__table__)
@@ -1,20 +1,34 @@
 from flask import jsonify, request
 from flask_restful import Resource
+from marshmallow.schema import UnmarshalResult
+from app.common.replicas import read_from_replica
 from app.models import InvalidArguments, NotFound
-from app.resources.responses import not_found_response, deleted_response, no_input_response, invalid_args_response
+from app.resources.responses import not_found_response, deleted_response, no_input_response, invalid_args_response, \
+    ndjson_response, wants_ndjson, instance_etag, collection_etag, is_not_modified, with_cache_headers, \
+    not_modified_response
 
 class BaseAPI(Resource):
+    # most statements per request by method, see init_query_budget
+    query_budget = {'GET': 1}
+
     @staticmethod
     def _parse_request_json(data):
         raise NotImplemented()
 
     def get(self, id):
+        read_from_replica()
         instance = self.model_cls.get(id)
         if not instance:
             return not_found_response(self.model_cls.__name__, id)
 
+        # a matching copy skips serialization
+        last_modified = instance.last_modified
+        etag = instance_etag(instance.id, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
         json_result = self.model_schema.dump(instance)
-        return jsonify(json_result.data)
+        return with_cache_headers(jsonify(json_result.data), etag, last_modified)
 
     def put(self, id):
         instance = self.model_cls.get(id)
@@ -49,28 +63,47 @@ class BaseAPI(Resource):
 
 
 class BaseListAPI(Resource):
+    # the collection version, a parent robot or route, and the rows, however many there are
+    query_budget = {'GET': 6}
+
     @staticmethod
     def _parse_schema_data(data):
         raise NotImplemented()
 
     def get(self):
+        read_from_replica()
         qs = request.query_string
+        streamed = wants_ndjson(request.accept_mimetypes)
+        etag = collection_etag(self.model_cls.collection_version(qs), qs, streamed)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
         try:
-            instances = self.model_cls.get_all(query_string=qs)
+            instances = self.model_cls.get_all(query_string=qs, streamed=streamed)
         except NotFound as e:
             e_args = e.args[0]
             return not_found_response(e_args['resource_name'], e_args['id'])
         except InvalidArguments as e:
             return invalid_args_response(e.args[0])
 
+        if streamed:
+            return with_cache_headers(ndjson_response(self.model_schema, instances), etag)
+
         result = self.models_schema.dump(instances)
-        return jsonify(result.data)
+        response = jsonify(result.data)
+        next_cursor = getattr(instances, 'next_cursor', None)
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = str(next_cursor)
+        return with_cache_headers(response, etag)
 
     def post(self):
         json_data = request.get_json()
         if not json_data:
             return no_input_response()
 
+        if isinstance(json_data, list):
+            return self._post_many(json_data)
+
         data = self.model_schema.load(json_data)
         if data.errors:
             return invalid_args_response(data.errors)
@@ -85,3 +118,18 @@ class BaseListAPI(Resource):
         schema_result = self.model_schema.dump(instance)
         return jsonify(schema_result.data)
 
+    def _post_many(self, json_data):
+        # validate every item, then create them all in one transaction or none at all
+        data = self.model_schema.load(json_data, many=True)
+        if data.errors:
+            return invalid_args_response(data.errors)
+
+        items = [self._parse_schema_data(UnmarshalResult(item, {})) for item in data.data]
+
+        try:
+            instances = self.model_cls.create_many(items)
+        except InvalidArguments as e:
+            return invalid_args_response(e.args[0])
+
+        result = self.models_schema.dump(instances)
+        return jsonify(result.data)
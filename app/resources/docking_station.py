@@ -2,15 +2,14 @@ from flask import request
 
 from app.models.docking_station import DockingStation
 from app.resources.base import BaseAPI, BaseListAPI
+from app.schemas.compiled import compile_schema
 from app.schemas.docking_station import DockingStationSchema, DockingStationUpdateSchema
 
 
 class DockingStationAPI(BaseAPI):
-    def __init__(self):
-        self.model_schema = DockingStationSchema()
-        self.model_update_schema = DockingStationUpdateSchema()
-        self.model_cls = DockingStation
-        super(DockingStationAPI, self).__init__()
+    model_schema = compile_schema(DockingStationSchema())
+    model_update_schema = DockingStationUpdateSchema()
+    model_cls = DockingStation
 
     @staticmethod
     def _parse_request_json(data):
@@ -22,11 +21,9 @@ class DockingStationAPI(BaseAPI):
         }
 
 class DockingStationListAPI(BaseListAPI):
-    def __init__(self):
-        self.model_schema = DockingStationSchema()
-        self.models_schema = DockingStationSchema(many=True)
-        self.model_cls = DockingStation
-        super(DockingStationListAPI, self).__init__()
+    model_schema = compile_schema(DockingStationSchema())
+    models_schema = compile_schema(DockingStationSchema(many=True))
+    model_cls = DockingStation
 
     @staticmethod
     def _parse_schema_data(schema_data):
@@ -1,6 +1,10 @@
-from flask import jsonify, make_response
+import hashlib
+
+from flask import Response, json, jsonify, make_response, stream_with_context
 from flask_restful import abort
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
 
 def not_found_response(resource_name, id):
     return abort(404, error='{} {} could not be found'.format(resource_name, id))
@@ -15,3 +19,61 @@ def no_input_response():
 
 def invalid_args_response(msgs):
     return abort(400, errors=msgs)
+
+
+def instance_etag(id, last_modified):
+    return '{}-{}'.format(id, last_modified.strftime('%Y%m%d%H%M%S%f'))
+
+
+def collection_etag(version, query_string, streamed=False):
+    # the same rows can serialize differently for other arguments or another content type
+    return hashlib.sha1(repr((version, query_string, streamed)).encode('utf-8')).hexdigest()
+
+
+def is_not_modified(request, etag, last_modified=None):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since:
+        # http dates only have second precision
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def with_cache_headers(response, etag, last_modified=None):
+    # clients may keep the response but have to revalidate it before every use
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified_response(etag, last_modified=None):
+    return with_cache_headers(Response(status=304), etag, last_modified)
+
+
+def streamed_list_response(schema, rows):
+    # write a json list one row at a time instead of building it in memory
+    def generate():
+        separator = '['
+        for row in rows:
+            yield separator + json.dumps(schema.dump(row).data)
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def wants_ndjson(accept_mimetypes):
+    # opt-in only: a wildcard or plain json Accept header still gets a json list
+    return accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def ndjson_response(schema, rows):
+    # one json document per line, each written as soon as its row comes off the cursor.
+    # the wsgi server buffers the writes
+    def generate():
+        for row in rows:
+            yield json.dumps(schema.dump(row).data) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -1,16 +1,24 @@
-from flask import request
+import json
+from datetime import datetime
+from flask import jsonify, request
+from flask_restful import Resource
 
+from app.common.helpers import validate_and_extract_datetimes
+from app.common.replicas import read_from_replica
+from app.models import InvalidArguments
 from app.models.robot import Robot
+from app.models.robot_route import RobotRoute
 from app.resources.base import BaseAPI, BaseListAPI
-from app.schemas.robot import RobotSchema
+from app.resources.responses import invalid_args_response, no_input_response, streamed_list_response
+from app.schemas.compiled import compile_schema
+from app.schemas.robot import RobotSchema, RobotAssignmentSchema, RobotPositionSchema, RobotReassignmentSchema
 
 
 class RobotAPI(BaseAPI):
-    def __init__(self):
-        self.model_schema = RobotSchema()
-        self.model_update_schema = RobotSchema()
-        self.model_cls = Robot
-        super(RobotAPI, self).__init__()
+    query_budget = {'GET': 1, 'DELETE': 4}
+    model_schema = compile_schema(RobotSchema())
+    model_update_schema = RobotSchema()
+    model_cls = Robot
 
     @staticmethod
     def _parse_request_json(data):
@@ -21,15 +29,69 @@ class RobotAPI(BaseAPI):
 
 
 class RobotListAPI(BaseListAPI):
-    def __init__(self):
-        self.model_schema = RobotSchema()
-        self.models_schema = RobotSchema(many=True)
-        self.model_cls = Robot
-        super(RobotListAPI, self).__init__()
+    model_schema = compile_schema(RobotSchema())
+    models_schema = compile_schema(RobotSchema(many=True))
+    model_cls = Robot
 
     @staticmethod
     def _parse_schema_data(schema_data):
         route_id = schema_data.data.get('route_id')
         docking_station_id = schema_data.data.get('docking_station_id')
 
-        return [route_id, docking_station_id]
\ No newline at end of file
+        return [route_id, docking_station_id]
+
+
+class RobotSnapshotAPI(Resource):
+    query_budget = {'GET': 1}
+    assignment_schema = compile_schema(RobotAssignmentSchema())
+
+    def get(self):
+        read_from_replica()
+        qs = request.query_string
+        query_string = json.loads(qs) if qs else {}
+        try:
+            target_dt, _, _ = validate_and_extract_datetimes(query_string)
+        except InvalidArguments as e:
+            return invalid_args_response(e.args[0])
+
+        if not target_dt:
+            return invalid_args_response('target_ts is required')
+
+        assignments = RobotRoute.get_assignments_at_ts(target_dt)
+        return streamed_list_response(self.assignment_schema, assignments)
+
+
+class RobotPositionsAPI(Resource):
+    position_schema = compile_schema(RobotPositionSchema())
+    query_budget = {'GET': 2}
+
+    def get(self):
+        read_from_replica()
+        qs = request.query_string
+        query_string = json.loads(qs) if qs else {}
+        try:
+            target_dt, _, _ = validate_and_extract_datetimes(query_string)
+        except InvalidArguments as e:
+            return invalid_args_response(e.args[0])
+
+        positions = Robot.positions_at_ts(target_dt or datetime.utcnow())
+        return streamed_list_response(self.position_schema, positions)
+
+
+class RobotReassignmentAPI(Resource):
+    reassignment_schema = RobotReassignmentSchema(many=True)
+
+    def post(self):
+        json_data = request.get_json()
+        if not json_data:
+            return no_input_response()
+
+        if not isinstance(json_data, list):
+            return invalid_args_response('Reassignments must be an array of moves')
+
+        data = self.reassignment_schema.load(json_data)
+        if data.errors:
+            return invalid_args_response(data.errors)
+
+        results = Robot.reassign_many(data.data)
+        return jsonify(results)
@@ -2,15 +2,14 @@ from flask import request
 
 from app.models.route import Route
 from app.resources.base import BaseAPI, BaseListAPI
+from app.schemas.compiled import compile_schema
 from app.schemas.route import RouteSchema
 
 
 class RouteAPI(BaseAPI):
-    def __init__(self):
-        self.model_schema = RouteSchema()
-        self.model_update_schema = RouteSchema()
-        self.model_cls = Route
-        super(RouteAPI, self).__init__()
+    model_schema = compile_schema(RouteSchema())
+    model_update_schema = RouteSchema()
+    model_cls = Route
 
     @staticmethod
     def _parse_request_json(data):
@@ -18,11 +17,9 @@ class RouteAPI(BaseAPI):
 
 
 class RouteListAPI(BaseListAPI):
-    def __init__(self):
-        self.model_schema = RouteSchema()
-        self.models_schema = RouteSchema(many=True)
-        self.model_cls = Route
-        super(RouteListAPI, self).__init__()
+    model_schema = compile_schema(RouteSchema())
+    models_schema = compile_schema(RouteSchema(many=True))
+    model_cls = Route
 
     @staticmethod
     def _parse_schema_data(schema_data):
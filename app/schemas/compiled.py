@@ -0,0 +1,141 @@
+import time
+from datetime import timezone
+
+from marshmallow import Schema, fields, utils
+from marshmallow.marshalling import missing
+from marshmallow.schema import MarshalResult
+
+from app.common.metrics import observe_serialization
+
+ISO_FORMATS = ('iso', 'iso8601')
+
+
+def compile_schema(schema):
+    """
+    Wrap a schema instance so dump skips marshmallow's per-field dispatch.
+
+    Anything the compiled path does not special-case is serialized by the field itself,
+    so the output is the same as schema.dump(obj).data. Everything else (load, many, ...)
+    is the schema's own.
+    """
+    return CompiledSchema(schema)
+
+
+class CompiledSchema(object):
+    def __init__(self, schema):
+        self.schema = schema
+        self._dump_one = _compile(schema)
+
+    def __getattr__(self, name):
+        return getattr(self.schema, name)
+
+    def dump(self, obj, many=None):
+        start = time.perf_counter()
+        try:
+            return self._dump(obj, many)
+        finally:
+            observe_serialization(time.perf_counter() - start)
+
+    def _dump(self, obj, many):
+        many = self.schema.many if many is None else many
+        if self._dump_one is None:
+            return self.schema.dump(obj, many=many)
+
+        if many:
+            return MarshalResult([self._dump_one(item) for item in obj], {})
+        return MarshalResult(self._dump_one(obj), {})
+
+
+def _compile(schema):
+    # hooks, inferred fields and custom accessors can change the output per object, keep the plain dump for those
+    if (schema._has_processors or schema.prefix or schema.opts.fields or schema.opts.additional
+            or schema.__accessor__ or type(schema).get_attribute is not Schema.get_attribute):
+        return None
+
+    plan = []
+    for attr_name, field in schema.fields.items():
+        if field.load_only:
+            continue
+        if not field._CHECK_ATTRIBUTE:
+            # method and function fields compute their own value
+            plan.append((field.dump_to or attr_name, None, None, _field_serializer(schema, attr_name, field), False))
+            continue
+        attribute = field.attribute or attr_name
+        serialize = _specialized(schema, field)
+        if serialize is None:
+            plan.append((field.dump_to or attr_name, attribute, field.default, _generic(field, attr_name), False))
+        else:
+            # specialized fields dump None as None, so they are only called with other values
+            plan.append((field.dump_to or attr_name, attribute, field.default, serialize, True))
+
+    dict_class = schema.dict_class
+    plain_types = {}
+
+    def dump_one(obj):
+        plain = plain_types.get(type(obj))
+        if plain is None:
+            # objects without __getitem__ (model instances) can skip marshmallow's obj[key] attempt
+            plain = plain_types[type(obj)] = not hasattr(type(obj), '__getitem__')
+
+        try:
+            items = []
+            for key, attribute, default, serialize, skips_none in plan:
+                if attribute is None:
+                    value = serialize(obj)
+                else:
+                    if plain and '.' not in attribute:
+                        value = getattr(obj, attribute, missing)
+                        if callable(value):
+                            value = value()
+                    else:
+                        value = utils.get_value(attribute, obj)
+
+                    if value is missing:
+                        value = _default(default)
+                    elif value is not None or not skips_none:
+                        value = serialize(value, obj)
+
+                if value is not missing:
+                    items.append((key, value))
+        except Exception:
+            # let marshmallow decide what a failing field looks like
+            return schema.dump(obj, many=False).data
+
+        return dict_class(items)
+
+    return dump_one
+
+
+def _field_serializer(schema, attr_name, field):
+    return lambda obj: field.serialize(attr_name, obj, accessor=schema.get_attribute)
+
+
+def _generic(field, attr_name):
+    return lambda value, obj: field._serialize(value, attr_name, obj)
+
+
+def _specialized(schema, field):
+    field_type = type(field)
+    if field_type in (fields.Integer, fields.Float) and not field.as_string:
+        num_type = field.num_type
+        return lambda value, obj: num_type(value)
+
+    if field_type is fields.DateTime and not field.localtime:
+        dateformat = field.dateformat or schema.opts.dateformat or fields.DateTime.DEFAULT_FORMAT
+        if dateformat in ISO_FORMATS:
+            return _isoformat
+
+    return None
+
+
+def _isoformat(value, obj):
+    # utils.isoformat without pytz: naive datetimes are UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc).isoformat()
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _default(default):
+    if default is missing:
+        return missing
+    return default() if callable(default) else default
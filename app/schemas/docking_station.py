@@ -7,6 +7,8 @@ class DockingStationSchema(Schema):
     latitude = fields.Float(required=True)
     created_ts = fields.DateTime(dump_only=True)
     modified_ts = fields.DateTime(dump_only=True)
+    # nautical miles, only set on nearest docking station queries
+    distance = fields.Float(dump_only=True)
 
 class DockingStationUpdateSchema(Schema):
     latitude = fields.Float()
@@ -7,3 +7,22 @@ class RobotSchema(Schema):
     docking_station_id = fields.Int()
     created_ts = fields.DateTime(dump_only=True)
     modified_ts = fields.DateTime(dump_only=True)
+
+
+class RobotReassignmentSchema(Schema):
+    robot_id = fields.Int(required=True)
+    route_id = fields.Int()
+    docking_station_id = fields.Int()
+
+
+class RobotPositionSchema(Schema):
+    robot_id = fields.Int(dump_only=True)
+    route_id = fields.Int(dump_only=True)
+    longitude = fields.Float(dump_only=True)
+    latitude = fields.Float(dump_only=True)
+
+
+class RobotAssignmentSchema(Schema):
+    robot_id = fields.Int(dump_only=True)
+    route_id = fields.Int(dump_only=True)
+    start_ts = fields.DateTime(dump_only=True)
@@ -1,8 +1,33 @@
 from marshmallow import Schema, fields
 
 
+class PointsField(fields.Field):
+    """
+    [[longitude, latitude], ...] loaded straight into an (n, 2) float64 array.
+
+    Converting the whole list with numpy avoids building a Float field per coordinate,
+    which dominates loading routes with tens of thousands of points.
+    """
+    default_error_messages = {
+        'invalid': 'Not a valid list of [longitude, latitude] pairs.'
+    }
+
+    def _deserialize(self, value, attr, data):
+        import numpy as np
+
+        try:
+            points = np.asarray(value, dtype=np.float64)
+        except (TypeError, ValueError):
+            self.fail('invalid')
+
+        # null coordinates convert to NaN
+        if points.ndim != 2 or points.shape[1] != 2 or np.isnan(points).any():
+            self.fail('invalid')
+        return points
+
+
 class RouteSchema(Schema):
     id = fields.Int(dump_only=True)
-    points = fields.List(fields.List(fields.Float, equal=2, load_only=True), required=True)
+    points = PointsField(required=True, load_only=True)
     created_ts = fields.DateTime(dump_only=True)
     modified_ts = fields.DateTime(dump_only=True)
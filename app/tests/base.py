@@ -1,12 +1,7 @@
 import unittest
-from flask import Flask
-from flask_restful import Api
-from flask_sqlalchemy import SQLAlchemy
 
 from config import TestConfig
-from app.resources.robot import RobotAPI, RobotListAPI
-from app.resources.route import RouteAPI, RouteListAPI
-from app.resources.docking_station import DockingStationAPI, DockingStationListAPI
+from app import create_app, db
 
 
 def clean_db(db):
@@ -15,22 +10,24 @@ def clean_db(db):
 
 
 class BaseTestCase(unittest.TestCase):
-    db = None
+    db = db
 
     @classmethod
     def setUpClass(cls):
         super(BaseTestCase, cls).setUpClass()
-        cls.app = Flask(__name__)
-        cls.app.config.from_object(TestConfig)
-        cls.db = SQLAlchemy(cls.app)
-        cls.register_api(cls.app)
+        cls.app = create_app(TestConfig)
         cls.client = cls.app.test_client()
-        cls.db.app = cls.app
+        # db is not bound to an app, test cases that replace setUp still need a context
+        cls.class_app_context = cls.app.app_context()
+        cls.class_app_context.push()
         cls.db.create_all()
 
     @classmethod
     def tearDownClass(cls):
+        cls.db.session.remove()
         cls.db.drop_all()
+        cls.db.get_engine(cls.app).dispose()
+        cls.class_app_context.pop()
         super(BaseTestCase, cls).tearDownClass()
 
     def setUp(self):
@@ -43,13 +40,3 @@ class BaseTestCase(unittest.TestCase):
         self.db.session.rollback()
         self.app_context.pop()
         super(BaseTestCase, self).tearDown()
-
-    @classmethod
-    def register_api(cls, app):
-        cls.api = Api(app)
-        cls.api.add_resource(RobotAPI, '/api/v1.0/robots/<int:id>', endpoint='robot')
-        cls.api.add_resource(RobotListAPI, '/api/v1.0/robots', endpoint='robots')
-        cls.api.add_resource(RouteAPI, '/api/v1.0/routes/<int:id>', endpoint='route')
-        cls.api.add_resource(RouteListAPI, '/api/v1.0/routes', endpoint='routes')
-        cls.api.add_resource(DockingStationAPI, '/api/v1.0/docking_stations/<int:id>', endpoint='docking_station')
-        cls.api.add_resource(DockingStationListAPI, '/api/v1.0/docking_stations', endpoint='docking_stations')
@@ -0,0 +1,84 @@
+import datetime
+import unittest
+from datetime import timezone
+
+from marshmallow import Schema, fields
+
+from app.schemas.compiled import compile_schema
+from app.schemas.docking_station import DockingStationSchema
+from app.schemas.robot import RobotAssignmentSchema, RobotSchema
+
+
+class Instance(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class ExampleSchema(Schema):
+    id = fields.Int(dump_only=True)
+    name = fields.Str(dump_to='label')
+    total = fields.Float(attribute='amount')
+    status = fields.Str(default='idle')
+    kind = fields.Method('get_kind')
+    secret = fields.Str(load_only=True)
+
+    def get_kind(self, obj):
+        return 'example {}'.format(obj.id)
+
+
+class CompiledSchemaTest(unittest.TestCase):
+    def setUp(self):
+        self.created_ts = datetime.datetime(2019, 7, 1, 8, 30, 15, 250)
+
+    def assertSameDump(self, schema, obj):
+        self.assertEqual(compile_schema(schema).dump(obj).data, schema.dump(obj).data)
+
+    def test_dump_matches_schema(self):
+        robots = [
+            Instance(id=1, route_id=2, docking_station_id=None, created_ts=self.created_ts, modified_ts=None),
+            Instance(id=2, route_id=None, docking_station_id=3, created_ts=self.created_ts,
+                     modified_ts=self.created_ts.replace(tzinfo=timezone(datetime.timedelta(hours=-5)))),
+        ]
+
+        self.assertSameDump(RobotSchema(many=True), robots)
+        self.assertSameDump(RobotSchema(), robots[0])
+
+    def test_dump_omits_missing_attributes(self):
+        docking_station = Instance(id=1, longitude=-74.0478, latitude=12, created_ts=self.created_ts,
+                                   modified_ts=None)
+        data = compile_schema(DockingStationSchema()).dump(docking_station).data
+
+        self.assertNotIn('distance', data)
+        self.assertSameDump(DockingStationSchema(), docking_station)
+
+        docking_station.distance = 12.5
+        self.assertSameDump(DockingStationSchema(), docking_station)
+
+    def test_dump_rows(self):
+        row = (1, 2, self.created_ts)
+
+        class Row(tuple):
+            robot_id = property(lambda self: self[0])
+            route_id = property(lambda self: self[1])
+            start_ts = property(lambda self: self[2])
+
+        self.assertSameDump(RobotAssignmentSchema(), Row(row))
+        self.assertSameDump(RobotAssignmentSchema(), {'robot_id': 1, 'route_id': 2, 'start_ts': self.created_ts})
+
+    def test_dump_field_options(self):
+        obj = Instance(id=3, name='three', amount=4, secret='hidden')
+
+        self.assertSameDump(ExampleSchema(), obj)
+        self.assertEqual(compile_schema(ExampleSchema()).dump(obj).data,
+                         {'id': 3, 'label': 'three', 'total': 4.0, 'status': 'idle', 'kind': 'example 3'})
+
+    def test_dump_invalid_value(self):
+        robot = Instance(id='not a number', route_id=None, docking_station_id=1, created_ts=self.created_ts,
+                         modified_ts=None)
+
+        self.assertSameDump(RobotSchema(), robot)
+
+    def test_load_uses_schema(self):
+        result = compile_schema(RobotSchema()).load({'route_id': 'x'})
+
+        self.assertEqual(result.errors, {'route_id': ['Not a valid integer.']})
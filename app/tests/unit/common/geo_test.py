@@ -0,0 +1,105 @@
+import struct
+import unittest
+
+from app.common.geo import (interpolate_along_polylines, linestring_ewkb, pack_points, points_to_polyline_distances,
+                            polyline_bounding_box, unpack_points, validate_points)
+from app.common.spatial_index import sphere_distance
+from app.models import InvalidArguments
+
+
+class GeoTest(unittest.TestCase):
+    def setUp(self):
+        self.route_points = [
+            [-79.6289, -10.7901],
+            [-77.0800, -16.5098],
+            [-73.7402, -22.4719],
+            [-75.4980, -30.6757],
+            [-81.9140, -36.9147]
+        ]
+
+    def test_points_to_polyline_distances(self):
+        points = [[-85.0341, -43.1330], [-86.7480, -22.6748], [-73.7402, -22.4719], [-114.6972, 11.3507]]
+        nm_distances = points_to_polyline_distances(points, self.route_points) / 1852
+
+        self.assertAlmostEqual(nm_distances[0], 399.88, delta=0.01)
+        self.assertAlmostEqual(nm_distances[1], 652.92, delta=0.01)
+        self.assertEqual(nm_distances[2], 0)
+        self.assertAlmostEqual(nm_distances[3], 2478.83, delta=0.01)
+
+    def test_points_to_polyline_distances_between_vertices(self):
+        # on the equator, the nearest point of the segment is away from both ends
+        nm_distances = points_to_polyline_distances([[0, 1]], [[-10, 0], [10, 0]]) / 1852
+        self.assertAlmostEqual(nm_distances[0], 60.04, delta=0.01)
+
+    def test_polyline_bounding_box(self):
+        min_longitude, min_latitude, max_longitude, max_latitude = polyline_bounding_box(self.route_points, 0)
+
+        self.assertAlmostEqual(min_longitude, -81.9140)
+        self.assertAlmostEqual(max_longitude, -73.7402)
+        self.assertAlmostEqual(min_latitude, -36.9147)
+        self.assertAlmostEqual(max_latitude, -10.7901)
+
+    def test_polyline_bounding_box_includes_arc_bulge(self):
+        # the great circle between these points reaches 59.2 degrees north
+        _, _, _, max_latitude = polyline_bounding_box([[-120, 40], [0, 40]], 0)
+        self.assertAlmostEqual(max_latitude, 59.21, delta=0.01)
+
+    def test_polyline_bounding_box_across_antimeridian(self):
+        min_longitude, _, max_longitude, _ = polyline_bounding_box([[179, 0], [-179, 0]], 1852)
+
+        self.assertIsNone(min_longitude)
+        self.assertIsNone(max_longitude)
+
+    def test_interpolate_along_polylines(self):
+        equator = [[0, 0], [1, 0], [1, 1]]
+        meridian = [[10, 10], [10, 10], [10, 11]]
+        degree = sphere_distance(0, 0, 1, 0)
+        points = interpolate_along_polylines(
+            [equator, meridian], [0, 0, 0, 1, 1, 0], [degree / 2, degree * 1.5, -1, degree / 2, 10 ** 9, 10 ** 9])
+
+        expected = [[0.5, 0], [1, 0.5], [0, 0], [10, 10.5], [10, 11], [1, 1]]
+        for point, expected_point in zip(points, expected):
+            self.assertAlmostEqual(point[0], expected_point[0], places=6)
+            self.assertAlmostEqual(point[1], expected_point[1], places=6)
+
+    def test_interpolate_along_polylines_follows_great_circles(self):
+        distance = sphere_distance(-60, 45, 60, 45)
+        longitude, latitude = interpolate_along_polylines([[[-60, 45], [60, 45]]], [0], [distance / 2])[0]
+
+        self.assertAlmostEqual(longitude, 0, places=6)
+        # the great circle bulges towards the pole
+        self.assertGreater(latitude, 60)
+
+    def test_interpolate_along_polylines_without_distances(self):
+        self.assertEqual(interpolate_along_polylines([self.route_points], [], []).shape, (0, 2))
+
+    def test_validate_points(self):
+        points = validate_points(self.route_points)
+        self.assertEqual(points.shape, (5, 2))
+        self.assertEqual(points.tolist(), self.route_points)
+
+    def test_validate_points_out_of_range(self):
+        with self.assertRaises(InvalidArguments) as context:
+            validate_points([[10301, 13001], [12, 12]])
+        self.assertEqual(context.exception.args[0], 'Latitude and/or Longitude are out of range')
+
+    def test_validate_points_with_invalid_shape(self):
+        for points in ([[1, 2], [3]], [1, 2], [['a', 2], [3, 4]]):
+            with self.assertRaises(InvalidArguments):
+                validate_points(points)
+
+    def test_validate_points_with_one_point(self):
+        with self.assertRaises(InvalidArguments) as context:
+            validate_points([[1, 2]])
+        self.assertEqual(context.exception.args[0], 'A route must have at least 2 points')
+
+    def test_pack_points(self):
+        packed = pack_points(self.route_points)
+        self.assertEqual(len(packed), 16 * len(self.route_points))
+        self.assertEqual(unpack_points(packed).tolist(), self.route_points)
+
+    def test_linestring_ewkb(self):
+        ewkb = linestring_ewkb([[1.5, 2.5], [3.5, 4.5]])
+
+        self.assertEqual(struct.unpack('<BIII', ewkb[:13]), (1, 0x20000002, 4326, 2))
+        self.assertEqual(struct.unpack('<4d', ewkb[13:]), (1.5, 2.5, 3.5, 4.5))
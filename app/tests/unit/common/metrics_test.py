@@ -0,0 +1,66 @@
+import unittest
+
+import sqlalchemy as sa
+from flask import Flask, jsonify
+
+from app.common.metrics import init_metrics, metrics
+
+
+class MetricsTest(unittest.TestCase):
+    def setUp(self):
+        metrics.clear()
+        self.engine = sa.create_engine('sqlite://')
+
+        self.app = Flask(__name__)
+        self.app.config['METRICS_ENABLED'] = True
+        init_metrics(self.app)
+
+        @self.app.route('/api/v1.0/robots', endpoint='robots')
+        def robots():
+            with self.engine.connect() as connection:
+                connection.execute('SELECT 1')
+                connection.execute('SELECT 2')
+            return jsonify([{'id': 1}])
+
+        @self.app.route('/api/v1.0/routes', endpoint='routes')
+        def routes():
+            raise ValueError()
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        metrics.clear()
+
+    def test_metrics(self):
+        self.client.get('/api/v1.0/robots')
+        self.client.get('/api/v1.0/robots')
+        response = self.client.get('/metrics')
+        lines = response.get_data(as_text=True).splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/plain')
+        self.assertIn('delivery_request_duration_seconds_bucket{endpoint="robots",le="+Inf"} 2', lines)
+        self.assertIn('delivery_request_duration_seconds_count{endpoint="robots"} 2', lines)
+        self.assertIn('delivery_requests_total{endpoint="robots",method="GET",status="200"} 2', lines)
+        self.assertIn('delivery_sql_statements_total{endpoint="robots"} 4', lines)
+        self.assertTrue(any(line.startswith('delivery_sql_duration_seconds_total{endpoint="robots"}')
+                            for line in lines))
+        self.assertTrue(any(line.startswith('delivery_serialization_duration_seconds_total{endpoint="robots"}')
+                            for line in lines))
+        # /metrics does not count itself
+        self.assertFalse(any('endpoint="metrics"' in line for line in lines))
+
+    def test_metrics_of_failed_and_unmatched_requests(self):
+        self.app.config['PROPAGATE_EXCEPTIONS'] = False
+        self.client.get('/api/v1.0/routes')
+        self.client.get('/api/v1.0/nothing')
+        lines = self.client.get('/metrics').get_data(as_text=True).splitlines()
+
+        self.assertIn('delivery_requests_total{endpoint="routes",method="GET",status="500"} 1', lines)
+        self.assertIn('delivery_requests_total{endpoint="unmatched",method="GET",status="404"} 1', lines)
+
+    def test_sql_outside_requests_is_not_counted(self):
+        with self.engine.connect() as connection:
+            connection.execute('SELECT 1')
+
+        self.assertEqual(dict(metrics.sql_statements), {})
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from collections import Counter
+
+from flask import Flask, jsonify, request
+from flask_restful import Api, Resource
+
+from app.common.profiler import format_breakdown, init_profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class RobotListAPI(Resource):
+    def get(self):
+        busy(0.05)
+        return jsonify(request.query_string.decode())
+
+
+class ProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.app = Flask(__name__)
+        self.app.config['PROFILING_ENABLED'] = True
+        self.app.config['PROFILE_DIR'] = self.directory
+        Api(self.app).add_resource(RobotListAPI, '/api/v1.0/robots', endpoint='robots')
+        init_profiler(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_profile_with_header(self):
+        response = self.client.get('/api/v1.0/robots', headers={'X-Profile': '1'})
+        path = response.headers['X-Profile-Path']
+
+        self.assertEqual(os.path.dirname(path), self.directory)
+        self.assertIn('-robots-', os.path.basename(path))
+        # the resource is not under app/resources, so its samples are flask-restful's
+        self.assertTrue(response.headers['X-Profile-Breakdown'].startswith('dispatch='))
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+        self.assertTrue(any('busy (app/tests/unit/common/profiler_test.py:' in line for line in lines))
+
+    def test_profile_with_argument(self):
+        response = self.client.get('/api/v1.0/robots', query_string='{"limit":1}&__profile=1')
+
+        self.assertIn('X-Profile-Path', response.headers)
+        # the resource sees the query string without the argument
+        self.assertEqual(response.get_json(), '{"limit":1}')
+
+    def test_not_profiled(self):
+        response = self.client.get('/api/v1.0/robots', query_string='{"limit":1}')
+
+        self.assertNotIn('X-Profile-Path', response.headers)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_format_breakdown(self):
+        self.assertEqual(format_breakdown(Counter({'db': 3, 'models': 1})), 'db=75.0%, models=25.0%')
+        self.assertEqual(format_breakdown(Counter()), 'no samples')
@@ -0,0 +1,80 @@
+import unittest
+
+import sqlalchemy as sa
+from flask import Flask, jsonify
+from flask_restful import Api, Resource
+
+from app.common.query_budget import QueryBudgetExceeded, count_queries, init_query_budget
+
+
+class QueryBudgetTest(unittest.TestCase):
+    def setUp(self):
+        engine = self.engine = sa.create_engine('sqlite://')
+
+        class RobotListAPI(Resource):
+            query_budget = {'GET': 2}
+
+            def get(self):
+                with engine.connect() as connection:
+                    for i in range(3):
+                        connection.execute('SELECT {}'.format(i % 2))
+                return jsonify([])
+
+        class RouteListAPI(Resource):
+            def get(self):
+                with engine.connect() as connection:
+                    for i in range(3):
+                        connection.execute('SELECT 1')
+                return jsonify([])
+
+        self.app = Flask(__name__)
+        self.app.config['QUERY_BUDGET'] = 'raise'
+        api = Api(self.app)
+        api.add_resource(RobotListAPI, '/api/v1.0/robots', endpoint='robots')
+        api.add_resource(RouteListAPI, '/api/v1.0/routes', endpoint='routes')
+        init_query_budget(self.app)
+        self.client = self.app.test_client()
+
+    def test_count_queries(self):
+        with count_queries() as queries:
+            with self.engine.connect() as connection:
+                for statement in ['SELECT 1', 'SELECT 1', 'SELECT 2']:
+                    connection.execute(statement)
+
+        self.assertEqual(len(queries), 3)
+        self.assertEqual([count for count, _, _ in queries.statements.values()], [2, 1])
+        origins = list(queries.statements['SELECT 1'][2])
+        self.assertEqual(len(origins), 1)
+        self.assertTrue(origins[0].startswith('app/tests/unit/common/query_budget_test.py:'))
+
+        report = queries.report().splitlines()
+        self.assertTrue(report[0].startswith('queries: 3 statements'))
+        self.assertIn('SELECT 1', report[1])
+
+    def test_nested_blocks(self):
+        with count_queries() as outer:
+            with self.engine.connect() as connection:
+                connection.execute('SELECT 1')
+                with count_queries() as inner:
+                    connection.execute('SELECT 2')
+
+        self.assertEqual(len(outer), 2)
+        self.assertEqual(len(inner), 1)
+
+    def test_over_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            self.client.get('/api/v1.0/robots')
+
+        self.assertIn('GET robots over a budget of 2', str(raised.exception))
+        self.assertIn('   2x', str(raised.exception))
+
+    def test_over_budget_warns(self):
+        self.app.config['QUERY_BUDGET'] = 'warn'
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            response = self.client.get('/api/v1.0/robots')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('GET robots over a budget of 2', logs.output[0])
+
+    def test_no_budget(self):
+        self.assertEqual(self.client.get('/api/v1.0/routes').status_code, 200)
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+
+from flask import Flask, jsonify
+
+from app.common.recorder import init_request_recorder
+
+
+class RequestRecorderTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+
+        self.app = Flask(__name__)
+        self.app.config['REQUEST_LOG_PATH'] = self.path
+        init_request_recorder(self.app)
+
+        @self.app.route('/api/v1.0/robots', methods=['GET', 'POST'], endpoint='robots')
+        def robots():
+            return jsonify([])
+
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def recorded(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_records_requests(self):
+        query_string = json.dumps({'limit': 2})
+        self.client.get('/api/v1.0/robots', query_string=query_string, headers={'Accept': 'application/x-ndjson'})
+        self.client.post('/api/v1.0/robots', json=[{'route_id': 1}])
+
+        get, post = self.recorded()
+        self.assertEqual(get['method'], 'GET')
+        self.assertEqual(get['path'], '/api/v1.0/robots')
+        self.assertEqual(get['query'], query_string)
+        self.assertIsNone(get['body'])
+        self.assertEqual(get['headers'], {'Accept': 'application/x-ndjson'})
+        self.assertEqual(get['endpoint'], 'robots')
+        self.assertEqual(post['body'], [{'route_id': 1}])
+        self.assertLessEqual(get['ts'], post['ts'])
+
+    def test_records_unknown_paths(self):
+        self.client.get('/api/v1.0/nothing')
+
+        self.assertEqual([(line['path'], line['endpoint']) for line in self.recorded()], [('/api/v1.0/nothing', None)])
+
+    def test_without_path(self):
+        app = Flask(__name__)
+        init_request_recorder(app)
+
+        self.assertEqual(app.before_request_funcs, {})
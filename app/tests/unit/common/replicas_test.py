@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask, g
+from sqlalchemy.pool import QueuePool
+
+from app import db
+from app.common.replicas import READ_PRIMARY_HEADER, RoutingSQLAlchemy, read_from_replica, use_primary
+from app.models.docking_station import DockingStation
+from app.tests.base import BaseTestCase
+from config import TestConfig
+
+
+class ReplicasTest(BaseTestCase):
+    def setUp(self):
+        super(ReplicasTest, self).setUp()
+        # a second engine on the test database stands in for the replica
+        self.app.config['SQLALCHEMY_BINDS'] = {'replica_0': TestConfig.SQLALCHEMY_DATABASE_URI}
+        self.app.config['READ_REPLICA_BINDS'] = ['replica_0']
+        self.primary = db.get_engine(self.app)
+        self.replica = db.get_engine(self.app, bind='replica_0')
+        db.session.remove()
+
+    def tearDown(self):
+        g.pop('read_replica_bind', None)
+        db.session.remove()
+        self.app.config['SQLALCHEMY_BINDS'] = TestConfig.SQLALCHEMY_BINDS
+        self.app.config['READ_REPLICA_BINDS'] = TestConfig.READ_REPLICA_BINDS
+        super(ReplicasTest, self).tearDown()
+
+    def bind(self):
+        return db.session.get_bind(mapper=DockingStation.__mapper__)
+
+    def test_reads_go_to_replica(self):
+        with self.app.test_request_context():
+            read_from_replica()
+
+            self.assertIs(self.bind(), self.replica)
+            self.assertEqual(DockingStation.get_all(), [])
+
+    def test_reads_without_replica_go_to_primary(self):
+        with self.app.test_request_context():
+            self.assertIs(self.bind(), self.primary)
+
+    def test_read_primary_header(self):
+        with self.app.test_request_context(headers={READ_PRIMARY_HEADER: '1'}):
+            read_from_replica()
+
+            self.assertIs(self.bind(), self.primary)
+
+    def test_reads_after_write_go_to_primary(self):
+        with self.app.test_request_context():
+            read_from_replica()
+            docking_station = DockingStation.create(-74.0478, 12.4687)
+
+            self.assertIs(self.bind(), self.primary)
+            self.assertEqual(DockingStation.get_all(), [docking_station])
+
+    def test_reads_with_pending_changes_go_to_primary(self):
+        with self.app.test_request_context():
+            read_from_replica()
+            db.session.add(DockingStation(longitude=-74.0478, latitude=12.4687))
+
+            self.assertIs(self.bind(), self.primary)
+
+    def test_use_primary(self):
+        with self.app.test_request_context():
+            read_from_replica()
+            with use_primary():
+                self.assertIs(self.bind(), self.primary)
+
+            self.assertIs(self.bind(), self.replica)
+
+
+class ForkSafetyTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + self.path
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        # sqlite files get a NullPool by default
+        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'poolclass': QueuePool}
+        self.engine = RoutingSQLAlchemy(self.app).get_engine(self.app)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def dbapi_connection(self):
+        with self.engine.connect() as connection:
+            return connection.connection.connection
+
+    def test_connections_are_reused_in_the_same_process(self):
+        self.assertIs(self.dbapi_connection(), self.dbapi_connection())
+
+    def test_connections_from_before_a_fork_are_replaced(self):
+        parent = self.dbapi_connection()
+        with mock.patch('app.common.replicas.os.getpid', return_value=os.getpid() + 1):
+            child = self.dbapi_connection()
+
+        self.assertIsNot(child, parent)
+        # the parent's connection is dropped, not closed
+        parent.execute('SELECT 1')
@@ -0,0 +1,81 @@
+import unittest
+from datetime import datetime, timezone
+
+from app.common.robot_timeline import RobotTimeline, RobotTimelineIndex
+
+
+class RobotTimelineTest(unittest.TestCase):
+    def setUp(self):
+        self.timeline = RobotTimeline([
+            (3, datetime(2018, 10, 12), datetime(2019, 1, 3), 30),
+            (1, datetime(2018, 1, 1), datetime(2018, 3, 3), 10),
+            (2, datetime(2018, 5, 27), datetime(2018, 10, 11), 20),
+            (4, datetime(2019, 6, 6), None, 40),
+        ])
+
+    def test_route_id_at(self):
+        self.assertEqual(self.timeline.route_id_at(datetime(2018, 2, 2)), 10)
+        self.assertEqual(self.timeline.route_id_at(datetime(2018, 5, 27)), 20)
+        self.assertEqual(self.timeline.route_id_at(datetime(2019, 7, 1)), 40)
+
+    def test_route_id_at_with_no_match(self):
+        self.assertIsNone(self.timeline.route_id_at(datetime(2017, 1, 1)))
+        self.assertIsNone(self.timeline.route_id_at(datetime(2018, 4, 4)))
+
+    def test_route_id_at_on_end(self):
+        self.assertIsNone(self.timeline.route_id_at(datetime(2018, 3, 3)))
+        self.timeline.add(5, datetime(2019, 1, 3), None, 50)
+        self.assertEqual(self.timeline.route_id_at(datetime(2019, 1, 3)), 50)
+
+    def test_route_id_at_with_aware_ts(self):
+        ts = datetime(2018, 2, 2, tzinfo=timezone.utc)
+        self.assertEqual(self.timeline.route_id_at(ts), 10)
+
+    def test_route_ids_in_range(self):
+        route_ids = self.timeline.route_ids_in_range(datetime(2018, 3, 1), datetime(2018, 10, 12))
+        self.assertEqual(route_ids, [10, 20, 30])
+
+    def test_route_ids_in_range_on_incomplete_route(self):
+        route_ids = self.timeline.route_ids_in_range(datetime(2019, 5, 12), datetime(2019, 7, 4))
+        self.assertEqual(route_ids, [40])
+
+    def test_route_ids_in_range_with_repeated_routes(self):
+        self.timeline.add(5, datetime(2019, 8, 1), None, 20)
+        self.timeline.end(4, datetime(2019, 7, 1))
+        route_ids = self.timeline.route_ids_in_range(datetime(2018, 1, 1), datetime(2019, 9, 1))
+        self.assertEqual(route_ids, [10, 20, 30, 40])
+
+    def test_route_ids_in_range_without_results(self):
+        route_ids = self.timeline.route_ids_in_range(datetime(2018, 3, 5), datetime(2018, 4, 5))
+        self.assertEqual(route_ids, [])
+
+    def test_end(self):
+        self.timeline.end(4, datetime(2019, 7, 1))
+        self.assertIsNone(self.timeline.route_id_at(datetime(2019, 7, 2)))
+
+
+class RobotTimelineIndexTest(unittest.TestCase):
+    def test_only_loaded_timelines_are_patched(self):
+        index = RobotTimelineIndex()
+        index.add(1, 1, datetime(2018, 1, 1), None, 10)
+        self.assertIsNone(index.get(1))
+
+        index.load(1, [])
+        index.add(1, 1, datetime(2018, 1, 1), None, 10)
+        self.assertEqual(index.get(1).route_id_at(datetime(2018, 2, 2)), 10)
+
+        index.drop(1)
+        self.assertIsNone(index.get(1))
+
+    def test_load_after_a_write_is_not_kept(self):
+        index = RobotTimelineIndex()
+        generation = index.generation(1)
+        index.add(1, 1, datetime(2018, 1, 1), None, 10)
+
+        # read before the write, so it misses robot route 1
+        timeline = index.load(1, [], generation)
+        self.assertIsNone(timeline.route_id_at(datetime(2018, 2, 2)))
+        self.assertIsNone(index.get(1))
+
+        index.load(1, [(1, datetime(2018, 1, 1), None, 10)], index.generation(1))
+        self.assertEqual(index.get(1).route_id_at(datetime(2018, 2, 2)), 10)
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import sqlalchemy as sa
+
+from app.common.slow_queries import SlowQueryLog
+from app.models.docking_station import DockingStation
+from app.models.robot import Robot
+from app.models.route import Route
+from app.tests.base import BaseTestCase
+
+
+def read_entries(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+class SlowQueryLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'logfile')
+        self.engine = sa.create_engine('sqlite://')
+        self.log = None
+
+    def tearDown(self):
+        if self.log:
+            self.log.close()
+        shutil.rmtree(self.directory)
+
+    def test_captures_slow_statements(self):
+        self.log = SlowQueryLog(self.path, threshold_ms=0, sample_rate=1).listen()
+        with self.engine.connect() as connection:
+            connection.execute(sa.text('SELECT :value'), value='x' * 1000)
+
+        entry, = read_entries(self.path)
+        self.assertEqual(entry['statement'], 'SELECT ?')
+        self.assertEqual(len(entry['parameters'][0]), 200)
+        # plans are only taken on postgres
+        self.assertIsNone(entry['plan'])
+        self.assertIsNone(entry['endpoint'])
+
+    def test_threshold(self):
+        self.log = SlowQueryLog(self.path, threshold_ms=60000, sample_rate=1).listen()
+        with self.engine.connect() as connection:
+            connection.execute('SELECT 1')
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_sample_rate(self):
+        self.log = SlowQueryLog(self.path, threshold_ms=0, sample_rate=0).listen()
+        with self.engine.connect() as connection:
+            connection.execute('SELECT 1')
+
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_rotates(self):
+        self.log = SlowQueryLog(self.path, threshold_ms=0, sample_rate=1, max_bytes=200, backup_count=2).listen()
+        with self.engine.connect() as connection:
+            for i in range(10):
+                connection.execute('SELECT {}'.format(i))
+
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertTrue(os.path.exists(self.path + '.2'))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+
+
+class SlowQueryPlanTest(BaseTestCase):
+    def setUp(self):
+        super(SlowQueryPlanTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'logfile')
+        self.log = SlowQueryLog(self.path, threshold_ms=0, sample_rate=1)
+
+    def tearDown(self):
+        self.log.close()
+        shutil.rmtree(self.directory)
+        super(SlowQueryPlanTest, self).tearDown()
+
+    def test_radius_and_history_plans(self):
+        route = Route.create([[-79, 14], [-78, 15]])
+        robot = Robot.create(route.id, None)
+        DockingStation.create(-79, 14)
+
+        self.log.listen()
+        DockingStation.get_all_in_radius(-79, 14, 10)
+        robot.find_routes_by_ts_range()
+        DockingStation.create(-78, 15)
+
+        entries = read_entries(self.path)
+        radius, = [entry for entry in entries if 'ST_DWithin' in entry['statement']]
+        history, = [entry for entry in entries if 'JOIN robot_route' in entry['statement']]
+        insert = [entry for entry in entries if entry['statement'].startswith('INSERT')][0]
+
+        self.assertIn('Buffers', radius['plan'])
+        self.assertIn('actual time', radius['plan'])
+        self.assertIn('Buffers', history['plan'])
+        self.assertEqual(history['parameters']['robot_id'], robot.id)
+        # running a write again to explain it would repeat the write
+        self.assertIsNone(insert['plan'])
+        self.assertEqual(len(DockingStation.get_all()), 2)
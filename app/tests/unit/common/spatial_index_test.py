@@ -0,0 +1,50 @@
+import unittest
+
+from app.common.spatial_index import SpatialIndex, sphere_distance
+
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SpatialIndex()
+        self.index.load([
+            (1, -79.8706, 14.6045),  # 293.44 NM
+            (2, -80.4199, 10.9196),  # 299.18 NM
+            (3, -74.0478, 12.4687),  # 86.63 NM
+            (4, -83.5620, 11.4800),  # 475.43 NM
+            (5, 79.3000, -11.4662),  # 9319.52 NM
+        ])
+        self.target = (-75.4980, 12.1897)
+
+    def test_sphere_distance(self):
+        distance = sphere_distance(-74.0478, 12.4687, self.target[0], self.target[1])
+        self.assertAlmostEqual(distance / 1852, 86.63, delta=0.1)
+
+    def test_ids_in_radius(self):
+        self.assertEqual(sorted(self.index.ids_in_radius(self.target[0], self.target[1], 300 * 1852)), [1, 2, 3])
+        self.assertEqual(self.index.ids_in_radius(self.target[0], self.target[1], 100 * 1852), [3])
+        self.assertEqual(self.index.ids_in_radius(self.target[0], self.target[1], 0), [])
+
+    def test_ids_in_radius_across_antimeridian(self):
+        self.index.add(6, 179.9, 0)
+        self.index.add(7, -179.9, 0)
+
+        self.assertEqual(sorted(self.index.ids_in_radius(-179.95, 0, 20 * 1852)), [6, 7])
+
+    def test_ids_in_radius_near_pole(self):
+        self.index.add(6, 0, 89.5)
+        self.index.add(7, 180, 89.5)
+
+        self.assertEqual(sorted(self.index.ids_in_radius(90, 89.9, 60 * 1852)), [6, 7])
+
+    def test_add_moves_point(self):
+        self.index.add(3, 79.3000, -11.4662)
+
+        self.assertEqual(self.index.ids_in_radius(self.target[0], self.target[1], 100 * 1852), [])
+        self.assertEqual(sorted(self.index.ids_in_radius(79.3000, -11.4662, 1852)), [3, 5])
+
+    def test_remove(self):
+        self.index.remove(3)
+        self.index.remove(99)
+
+        self.assertEqual(self.index.ids_in_radius(self.target[0], self.target[1], 100 * 1852), [])
+        self.assertEqual(len(self.index), 4)
@@ -0,0 +1,73 @@
+import unittest
+
+import sqlalchemy as sa
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from app.common import sql_events
+from app.common.metrics import init_metrics
+from app.common.profiler import init_profiler
+from app.common.query_budget import init_query_budget
+from app.common.slow_queries import init_slow_query_log
+
+
+class SqlEventsTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = sa.create_engine('sqlite://')
+        self.first = []
+        self.second = []
+        sql_events.subscribe(self.observe_first)
+        sql_events.subscribe(self.observe_second)
+
+    def tearDown(self):
+        sql_events.unsubscribe(self.observe_first)
+        sql_events.unsubscribe(self.observe_second)
+
+    def observe_first(self, conn, statement, parameters, seconds, executemany):
+        self.first.append((statement, seconds))
+
+    def observe_second(self, conn, statement, parameters, seconds, executemany):
+        self.second.append((statement, seconds))
+
+    def test_each_statement_is_timed_once(self):
+        sql_events.subscribe(self.observe_first)
+        with self.engine.connect() as connection:
+            connection.execute('SELECT 1')
+            connection.execute('SELECT 2')
+
+        self.assertEqual([statement for statement, _ in self.first], ['SELECT 1', 'SELECT 2'])
+        # every subscriber gets the same timing
+        self.assertEqual(self.first, self.second)
+        self.assertTrue(all(seconds >= 0 for _, seconds in self.first))
+
+    def test_failed_statement(self):
+        with self.engine.connect() as connection:
+            with self.assertRaises(OperationalError):
+                connection.execute('SELECT * FROM nothing')
+            connection.execute('SELECT 1')
+
+            self.assertEqual(connection.info[sql_events.START_KEY], [])
+        self.assertEqual(self.first, [('SELECT 1', self.first[0][1])])
+
+    def test_unsubscribe(self):
+        sql_events.unsubscribe(self.observe_second)
+        with self.engine.connect() as connection:
+            connection.execute('SELECT 1')
+
+        self.assertEqual(len(self.first), 1)
+        self.assertEqual(self.second, [])
+
+
+class DisabledTest(unittest.TestCase):
+    def test_disabled_hooks_change_nothing(self):
+        app = Flask(__name__)
+        app.config.update(METRICS_ENABLED=False, QUERY_BUDGET='off', SLOW_QUERY_LOG_PATH=None,
+                          PROFILING_ENABLED=False)
+        subscribers = sql_events._subscribers
+        for init in (init_metrics, init_query_budget, init_slow_query_log, init_profiler):
+            init(app)
+
+        self.assertEqual(app.before_request_funcs, {})
+        self.assertEqual(app.teardown_request_funcs, {})
+        self.assertEqual(app.test_client().get('/metrics').status_code, 404)
+        self.assertEqual(sql_events._subscribers, subscribers)
@@ -1,5 +1,6 @@
 from geoalchemy2.elements import WKBElement
 
+from app.common.spatial_index import docking_station_index
 from app.models.robot import Robot
 from app.models.robot_route import RobotRoute
 from app.models.route import Route
@@ -94,6 +95,31 @@ class DockingStationTest(BaseTestCase):
         self.assertEqual(len(radius100), 1)
         self.assertEqual(len(radius0), 0)
 
+    def test_get_all_in_radius_with_spatial_index(self):
+        target_longitude = -75.4980
+        target_latitude = 12.1897
+
+        waypoints = self._get_waypoints()
+        for points in waypoints[:-1]:
+            DockingStation.create(points[0], points[1])
+
+        self.app.config['DOCKING_STATION_SPATIAL_INDEX'] = True
+        try:
+            radius300 = DockingStation.get_all_in_radius(target_longitude, target_latitude, 300)
+            # created after the index is loaded
+            DockingStation.create(waypoints[-1][0], waypoints[-1][1])
+            moved = DockingStation.get_all_in_radius(target_longitude, target_latitude, 100)[0]
+            moved.update(longitude=79.3000, latitude=-11.4662)
+            radius100 = DockingStation.get_all_in_radius(target_longitude, target_latitude, 100)
+            far_radius = DockingStation.get_all_in_radius(79.3000, -11.4662, 1)
+        finally:
+            self.app.config['DOCKING_STATION_SPATIAL_INDEX'] = False
+            docking_station_index.clear()
+
+        self.assertEqual(len(radius300), 6)
+        self.assertEqual(len(radius100), 0)
+        self.assertEqual(len(far_radius), 2)
+
     def test_get_all_in_route_radius(self):
         route = self._create_route()
         DockingStation.create(-85.0341, -43.1330)
@@ -111,6 +137,52 @@ class DockingStationTest(BaseTestCase):
         self.assertEqual(len(radius700), 3)
         self.assertEqual(len(radius2500), 4)
 
+    def test_get_all_in_route_radius_with_numpy_backend(self):
+        route = self._create_route()
+        DockingStation.create(-85.0341, -43.1330)
+        DockingStation.create(-86.7480, -22.6748)
+        DockingStation.create(-73.7402, -22.4719)
+        DockingStation.create(-114.6972, 11.3507)
+
+        self.app.config['ROUTE_RADIUS_BACKEND'] = 'numpy'
+        try:
+            radius0 = DockingStation.get_all_in_route_radius(route, 0)
+            radius400 = DockingStation.get_all_in_route_radius(route, 400)
+            radius700 = DockingStation.get_all_in_route_radius(route, 700)
+            radius2500 = DockingStation.get_all_in_route_radius(route, 2500)
+        finally:
+            self.app.config['ROUTE_RADIUS_BACKEND'] = 'postgis'
+
+        self.assertEqual(len(radius0), 1)
+        self.assertEqual(len(radius400), 2)
+        self.assertEqual(len(radius700), 3)
+        self.assertEqual(len(radius2500), 4)
+
+    def test_get_nearest(self):
+        target_longitude = -75.4980
+        target_latitude = 12.1897
+
+        for points in self._get_waypoints():
+            DockingStation.create(points[0], points[1])
+
+        nearest = DockingStation.get_nearest(target_longitude, target_latitude, 3)
+
+        self.assertEqual([docking_station.latitude for docking_station in nearest], [12.4687, 11.4662, 10.4662])
+        self.assertAlmostEqual(nearest[0].distance, 86.63, delta=0.1)
+        self.assertEqual(nearest, sorted(nearest, key=lambda docking_station: docking_station.distance))
+
+    def test_get_nearest_to_route(self):
+        route = self._create_route()
+        DockingStation.create(-85.0341, -43.1330)
+        on_route = DockingStation.create(-73.7402, -22.4719)
+        DockingStation.create(-114.6972, 11.3507)
+
+        nearest = DockingStation.get_nearest_to_route(route, 2)
+
+        self.assertEqual(len(nearest), 2)
+        self.assertEqual(nearest[0].id, on_route.id)
+        self.assertEqual(nearest[0].distance, 0)
+
     def _get_waypoints(self):
         return [
             [-79.8706, 14.6045],  # 293.44 NM
@@ -1,7 +1,10 @@
 from unittest import mock
 from datetime import datetime
 
+from app import db
 from app.tests.base import BaseTestCase
+from app.common.spatial_index import sphere_distance
+from app.common.query_budget import count_queries
 from app.models import InvalidArguments
 from app.models.robot import Robot
 from app.models.robot_route import RobotRoute
@@ -72,6 +75,57 @@ class RobotTest(BaseTestCase):
 
         self.assertIsNone(robot_db)
 
+    def test_delete_robot_with_history(self):
+        other_route = Route.create([[-77, 14], [-76, 15]])
+        short = Robot.create(self.route.id, None)
+        long = Robot.create(self.route.id, None)
+        for route_id in [other_route.id, self.route.id] * 5:
+            long.update(route_id=route_id)
+
+        with count_queries() as short_queries:
+            short.delete()
+        with count_queries() as long_queries:
+            long.delete()
+
+        self.assertEqual(len(long_queries), len(short_queries))
+        self.assertEqual(RobotRoute.query.filter(RobotRoute.robot_id.in_([short.id, long.id])).count(), 0)
+
+    def test_positions_at_ts(self):
+        robot = Robot.create(self.route.id, None)
+        Robot.create(None, self.docking_station.id)
+        start_ts = datetime(2019, 1, 1)
+        robot.current_robot_route().start_ts = start_ts
+        db.session.commit()
+
+        at_start, = Robot.positions_at_ts(start_ts, speed_knots=60)
+        an_hour_in, = Robot.positions_at_ts(datetime(2019, 1, 1, 1), speed_knots=60)
+        past_the_end, = Robot.positions_at_ts(datetime(2019, 1, 2), speed_knots=60)
+
+        self.assertEqual((at_start.robot_id, at_start.route_id), (robot.id, self.route.id))
+        self.assertAlmostEqual(at_start.longitude, -79)
+        self.assertAlmostEqual(at_start.latitude, 14)
+        nm_travelled = sphere_distance(-79, 14, an_hour_in.longitude, an_hour_in.latitude) / 1852
+        self.assertAlmostEqual(nm_travelled, 60, places=3)
+        self.assertAlmostEqual(past_the_end.longitude, -78)
+        self.assertAlmostEqual(past_the_end.latitude, 15)
+
+    def test_positions_at_ts_on_route_change(self):
+        robot = Robot.create(self.route.id, None)
+        route2 = Route.create([[-70, 10], [-71, 11]])
+        robot.update(route2.id, None)
+        ended_robot_route = [robot_route for robot_route in robot.robot_routes if robot_route.end_ts][0]
+
+        # the old robot route ends where the new one starts, the robot is only on the new one
+        position, = Robot.positions_at_ts(ended_robot_route.end_ts)
+        self.assertEqual((position.robot_id, position.route_id), (robot.id, route2.id))
+        self.assertEqual(RobotRoute.get_assignments_at_ts(ended_robot_route.end_ts).all(),
+                         [(robot.id, route2.id, ended_robot_route.end_ts)])
+
+    def test_positions_at_ts_before_any_routes(self):
+        Robot.create(self.route.id, None)
+
+        self.assertEqual(Robot.positions_at_ts(datetime(1999, 1, 1)), [])
+
     def test_update_robot_on_route_to_docking_station(self):
         robot = Robot.create(self.route.id, None)
         old_robot_route = robot.current_robot_route()
@@ -221,6 +275,65 @@ class RobotTest(BaseTestCase):
         expected_route_ids = sorted([data['robot_route_4_route_id'], data['robot_route_5_route_id']])
         self.assertEqual(result, expected_route_ids)
 
+    def test_find_routes_by_ts_range_ignores_other_robots(self):
+        data = self._create_robot_routes()
+        robot = data['robot']
+        other_route = Route.create([[-9, 14], [-10, 14]])
+        other_robot = Robot.create(other_route.id, None)
+        RobotRoute.create(other_robot.id, other_route.id, datetime(2018, 4, 1))
+
+        start_ts = datetime(2018, 3, 5)
+        end_ts = datetime(2018, 4, 5)
+
+        self.assertEqual(robot.find_routes_by_ts_range(start_ts=start_ts, end_ts=end_ts), [])
+        self.assertEqual(robot.find_route_by_ts(datetime(2018, 4, 2)), [])
+
+    def test_find_routes_with_timeline_index(self):
+        data = self._create_robot_routes()
+        robot = data['robot']
+        self.app.config['ROBOT_TIMELINE_INDEX'] = True
+        try:
+            route_at_ts = robot.find_route_by_ts(datetime(2018, 2, 2))[-1]
+            no_route_at_ts = robot.find_route_by_ts(datetime(2018, 4, 4))
+            routes = robot.find_routes_by_ts_range(start_ts=datetime(2018, 10, 12), end_ts=datetime(2019, 5, 9))
+
+            new_route = Route.create([[-12, 12], [-13, 13]])
+            robot.update(route_id=new_route.id)
+            current_routes = robot.find_routes_by_ts_range(start_ts=datetime.utcnow())
+        finally:
+            self.app.config['ROBOT_TIMELINE_INDEX'] = False
+
+        self.assertEqual(route_at_ts.id, data['robot_route_1_route_id'])
+        self.assertEqual(no_route_at_ts, [])
+        self.assertEqual(sorted([route.id for route in routes]),
+                         [data['robot_route_3_route_id'], data['robot_route_4_route_id']])
+        self.assertEqual([route.id for route in current_routes], [new_route.id])
+
+    def test_find_routes_backends_agree(self):
+        data = self._create_robot_routes()
+        robot = data['robot']
+        # the first route again after the last, so the range repeats a route
+        RobotRoute.query.filter_by(robot_id=robot.id, end_ts=None).one().update(datetime(2019, 7, 1))
+        RobotRoute.create(robot.id, data['robot_route_1_route_id'], datetime(2019, 8, 1))
+
+        results = []
+        for timeline_index in (False, True):
+            self.app.config['ROBOT_TIMELINE_INDEX'] = timeline_index
+            try:
+                # robot route 1 ends on 2018-03-03, robot route 2 starts on 2018-05-27
+                at_end = robot.find_route_by_ts(datetime(2018, 3, 3))
+                at_start = robot.find_route_by_ts(datetime(2018, 5, 27))
+                routes = robot.find_routes_by_ts_range(start_ts=datetime(2018, 1, 1), end_ts=datetime(2019, 9, 1))
+            finally:
+                self.app.config['ROBOT_TIMELINE_INDEX'] = False
+            results.append(([route.id for route in at_end], [route.id for route in at_start],
+                            [route.id for route in routes]))
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], ([], [data['robot_route_2_route_id']], [
+            data['robot_route_1_route_id'], data['robot_route_2_route_id'], data['robot_route_3_route_id'],
+            data['robot_route_4_route_id'], data['robot_route_5_route_id']]))
+
     def _create_robot_routes(self):
         robot = Robot.create(self.route.id, None)
         robot.robot_routes[-1].delete()
@@ -1,5 +1,8 @@
+import json
+
 from geoalchemy2.elements import WKBElement
 
+from app import db
 from app.models.robot import Robot
 from app.models.robot_route import RobotRoute
 from app.models.route import Route
@@ -31,6 +34,13 @@ class RouteTest(BaseTestCase):
         self.assertIsNone(db_route.modified_ts)
         self.assertEqual(db_route.robots, [])
 
+    def test_create_route_packs_points(self):
+        route = Route.create(self.points)
+        db_route = Route.get(route.id)
+
+        self.assertEqual(len(db_route.points), 16 * len(self.points))
+        self.assertEqual(db_route.points_array().tolist(), self.points)
+
     def test_get_route(self):
         route = Route.create(self.points)
         route_id = route.id
@@ -38,6 +48,39 @@ class RouteTest(BaseTestCase):
 
         self.assertEqual(db_route.id, route_id)
 
+    def test_get_route_from_database(self):
+        route = Route.create(self.points)
+        docking_station = DockingStation.create(-74.0478, 12.4687)
+        db.session.expunge_all()
+
+        # the cached lookup is per model class
+        self.assertIsInstance(Route.get(route.id), Route)
+        self.assertIsInstance(DockingStation.get(docking_station.id), DockingStation)
+        self.assertIs(Route.get(route.id), Route.get(route.id))
+
+    def test_last_modified(self):
+        route = Route.create(self.points)
+        self.assertEqual(route.last_modified, route.created_ts)
+
+        route.update([[-1.3223, -14.3221], [-1.0531, -15.3221]])
+        self.assertEqual(route.last_modified, route.modified_ts)
+
+    def test_collection_version(self):
+        route = Route.create(self.points)
+        version = Route.collection_version()
+        history_version = Route.collection_version(json.dumps({'robot_id': 1}))
+
+        route.update([[-1.3223, -14.3221], [-1.0531, -15.3221]])
+        self.assertNotEqual(Route.collection_version(), version)
+        self.assertEqual(len(history_version), 2)
+
+        version = Route.collection_version()
+        history_version = Route.collection_version(json.dumps({'robot_id': 1}))
+        Robot.create(route.id, None)
+        # a new robot route changes route history, not the routes themselves
+        self.assertEqual(Route.collection_version(), version)
+        self.assertNotEqual(Route.collection_version(json.dumps({'robot_id': 1})), history_version)
+
     def test_get_nonexistent_route(self):
         route = Route.get(100)
         self.assertIsNone(route)
@@ -52,6 +95,7 @@ class RouteTest(BaseTestCase):
         route.update(new_points)
         self.assertNotEqual(route.path, original_path)
         self.assertNotEqual(route.points, original_points)
+        self.assertEqual(route.points_array().tolist(), new_points)
         self.assertIsNotNone(route.modified_ts)
 
     def test_delete_route(self):
@@ -71,6 +71,51 @@ class DockingStationAPITest(BaseTestCase):
         self.assertEqual(len(data), 2)
         self.assertEqual(response.status_code, 200)
 
+    def test_get_nearest_docking_stations(self):
+        json_data = json.dumps({'nearest': 2, 'target_latitude': 12.1897, 'target_longitude': -75.4980})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([docking_station['id'] for docking_station in data],
+                         [self.docking_station.id, self.docking_station2.id])
+        self.assertTrue(data[0]['distance'] < data[1]['distance'])
+
+    def test_get_nearest_docking_stations_to_route(self):
+        route = Route.create([[-75.4980, 12.1897], [-75.4990, 12.1900]])
+        json_data = json.dumps({'nearest': 1, 'route_id': route.id})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['id'], self.docking_station.id)
+
+    def test_get_nearest_docking_stations_with_invalid_nearest(self):
+        for nearest in [-1, 0, False, None, '2']:
+            json_data = json.dumps({'nearest': nearest, 'target_latitude': 12.1897, 'target_longitude': -75.4980})
+            response = self.client.get(BASE_URL, query_string=json_data)
+            data = json.loads(response.get_data())
+
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(data, {'errors': 'nearest must be a positive integer'})
+
+    def test_get_nearest_docking_stations_over_max_page_limit(self):
+        json_data = json.dumps({'nearest': 1001, 'target_latitude': 12.1897, 'target_longitude': -75.4980})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': 'nearest must be at most 1000'})
+
+    def test_get_nearest_docking_stations_to_nonexistent_route(self):
+        json_data = json.dumps({'nearest': 1, 'route_id': 99})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(data, {'error': 'Route 99 could not be found'})
+
     def test_put_docking_station(self):
         url = BASE_URL + '/{}'.format(self.docking_station.id)
         json_data = json.dumps({'longitude': 44})
@@ -140,3 +185,116 @@ class DockingStationAPITest(BaseTestCase):
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(data, {'errors': 'Latitude and/or Longitude are out of range'})
+
+    def test_create_docking_stations(self):
+        json_data = json.dumps([{'longitude': 30, 'latitude': 35}, {'longitude': 31, 'latitude': 36}])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(item['longitude'], item['latitude']) for item in data], [(30, 35), (31, 36)])
+        self.assertEqual(len(DockingStation.get_all()), 5)
+
+    def test_create_docking_stations_with_invalid_items(self):
+        json_data = json.dumps([{'longitude': 30, 'latitude': 35}, {'longitude': 30}, {'longitude': 30, 'latitude': 3500}])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': {'1': {'latitude': ['Missing data for required field.']}}})
+
+        json_data = json.dumps([{'longitude': 30, 'latitude': 35}, {'longitude': 30, 'latitude': 3500}])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': {'1': 'Latitude and/or Longitude are out of range'}})
+        self.assertEqual(len(DockingStation.get_all()), 3)
+
+    def test_get_docking_stations_page(self):
+        json_data = json.dumps({'limit': 2})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.docking_station.id, self.docking_station2.id])
+        self.assertEqual(response.headers['X-Next-Cursor'], str(self.docking_station2.id))
+
+        json_data = json.dumps({'limit': 2, 'after_id': int(response.headers['X-Next-Cursor'])})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.docking_station3.id])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_get_docking_stations_in_radius_page(self):
+        json_data = json.dumps({'radius': 500, 'target_latitude': 12.1897, 'target_longitude': -75.4980, 'limit': 1})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.docking_station.id])
+        self.assertEqual(response.headers['X-Next-Cursor'], str(self.docking_station.id))
+
+    def test_get_docking_stations_with_invalid_limit(self):
+        json_data = json.dumps({'limit': 0})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': 'limit must be an integer from 1 to 1000'})
+
+    def test_get_docking_stations_as_ndjson(self):
+        response = self.client.get(BASE_URL, headers={'Accept': 'application/x-ndjson'})
+        lines = response.get_data(as_text=True).splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in lines],
+                         [self.docking_station_schema.dump(docking_station).data
+                          for docking_station in [self.docking_station, self.docking_station2, self.docking_station3]])
+
+    def test_get_docking_stations_in_radius_as_ndjson(self):
+        json_data = json.dumps({'radius': 500, 'target_latitude': 12.1897, 'target_longitude': -75.4980})
+        response = self.client.get(BASE_URL, query_string=json_data, headers={'Accept': 'application/x-ndjson'})
+        lines = response.get_data(as_text=True).splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.docking_station.id, self.docking_station2.id])
+
+    def test_get_docking_stations_without_ndjson_accept(self):
+        response = self.client.get(BASE_URL, headers={'Accept': '*/*'})
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(len(data), 3)
+
+    def test_get_docking_stations_if_none_match(self):
+        etag = self.client.get(BASE_URL).headers['ETag']
+        response = self.client.get(BASE_URL, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+
+        DockingStation.create(10.0, 10.0)
+        response = self.client.get(BASE_URL, headers={'If-None-Match': etag})
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data), 4)
+
+    def test_get_docking_stations_if_none_match_after_delete(self):
+        etag = self.client.get(BASE_URL).headers['ETag']
+        self.docking_station3.delete()
+
+        response = self.client.get(BASE_URL, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_docking_stations_etag_depends_on_query_string(self):
+        json_data = json.dumps({'radius': 500, 'target_latitude': 12.1897, 'target_longitude': -75.4980})
+        etag = self.client.get(BASE_URL).headers['ETag']
+        response = self.client.get(BASE_URL, query_string=json_data, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,43 @@
+import unittest
+
+from flask import Flask
+from marshmallow import Schema, fields
+
+from app.resources.responses import ndjson_response, streamed_list_response
+
+
+class RowSchema(Schema):
+    id = fields.Int()
+
+
+class StreamedResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.read = []
+
+    def rows(self, count):
+        for i in range(count):
+            self.read.append(i)
+            yield {'id': i}
+
+    def test_ndjson_writes_each_row_as_it_is_read(self):
+        with self.app.test_request_context():
+            body = ndjson_response(RowSchema(), self.rows(3)).iter_encoded()
+
+            self.assertEqual(next(body), b'{"id": 0}\n')
+            self.assertEqual(self.read, [0])
+            self.assertEqual(list(body), [b'{"id": 1}\n', b'{"id": 2}\n'])
+
+    def test_list_writes_each_row_as_it_is_read(self):
+        with self.app.test_request_context():
+            body = streamed_list_response(RowSchema(), self.rows(2)).iter_encoded()
+
+            self.assertEqual(next(body), b'[{"id": 0}')
+            self.assertEqual(self.read, [0])
+            self.assertEqual(b''.join(body), b',{"id": 1}]')
+
+    def test_empty_list(self):
+        with self.app.test_request_context():
+            response = streamed_list_response(RowSchema(), self.rows(0))
+
+            self.assertEqual(response.get_data(), b'[]')
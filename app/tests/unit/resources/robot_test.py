@@ -1,5 +1,7 @@
+import datetime
 import json
 
+from app import db
 from app.models.route import Route
 from app.models.robot import Robot
 from app.models.robot_route import RobotRoute
@@ -124,3 +126,188 @@ class RobotAPITest(BaseTestCase):
         self.assertEqual(response.status_code, 400)
         expected_msgs = {'errors': 'Robot must have route_id or docking_station_id'}
         self.assertEqual(data, expected_msgs)
+
+    def test_get_robots_snapshot(self):
+        Robot.create(None, self.docking_station.id)
+        target_ts = datetime.datetime.now().timestamp()
+        json_data = json.dumps({'target_ts': target_ts})
+        response = self.client.get(BASE_URL + '/snapshot', query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['robot_id'], self.robot.id)
+        self.assertEqual(data[0]['route_id'], self.route.id)
+
+    def test_get_robots_snapshot_before_any_routes(self):
+        target_ts = datetime.datetime(1999, 1, 1).timestamp()
+        json_data = json.dumps({'target_ts': target_ts})
+        response = self.client.get(BASE_URL + '/snapshot', query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data, [])
+
+    def test_get_robots_snapshot_without_target_ts(self):
+        response = self.client.get(BASE_URL + '/snapshot')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': 'target_ts is required'})
+
+    def test_get_robots_positions(self):
+        Robot.create(None, self.docking_station.id)
+        start_ts = datetime.datetime(2019, 1, 1)
+        self.robot.current_robot_route().start_ts = start_ts
+        db.session.commit()
+        target_ts = (start_ts - datetime.datetime(1970, 1, 1)).total_seconds()
+        response = self.client.get(BASE_URL + '/positions', query_string=json.dumps({'target_ts': target_ts}))
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]['robot_id'], self.robot.id)
+        self.assertEqual(data[0]['route_id'], self.route.id)
+        self.assertAlmostEqual(data[0]['longitude'], -75.10)
+        self.assertAlmostEqual(data[0]['latitude'], 12.50)
+
+    def test_get_robots_positions_now(self):
+        response = self.client.get(BASE_URL + '/positions')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([position['robot_id'] for position in data], [self.robot.id])
+
+    def test_create_robots(self):
+        json_data = json.dumps([{'route_id': self.route.id}, {'docking_station_id': self.docking_station.id}])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['route_id'] for item in data], [self.route.id, None])
+        self.assertEqual([item['docking_station_id'] for item in data], [None, self.docking_station.id])
+
+        robot_on_route = Robot.get(data[0]['id'])
+        self.assertIsNotNone(robot_on_route.current_robot_route())
+        self.assertEqual(robot_on_route.current_robot_route().route_id, self.route.id)
+
+    def test_create_robots_with_invalid_items(self):
+        json_data = json.dumps([
+            {'route_id': self.route.id},
+            {'route_id': self.route.id, 'docking_station_id': self.docking_station.id},
+            {'route_id': 99}
+        ])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        expected_msgs = {'errors': {
+            '1': 'Robot must have route_id or docking_station_id',
+            '2': 'Route 99 could not be found'
+        }}
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, expected_msgs)
+        self.assertEqual(len(Robot.get_all()), 1)
+
+    def test_reassign_robots(self):
+        robot_at_station = Robot.create(None, self.docking_station.id)
+        new_route = Route.create([[-70.10, 12.50], [-71.42, 10.92]])
+        json_data = json.dumps([
+            {'robot_id': self.robot.id, 'docking_station_id': self.docking_station.id},
+            {'robot_id': robot_at_station.id, 'route_id': new_route.id}
+        ])
+        response = self.client.post(BASE_URL + '/reassignments', data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in data], ['moved', 'moved'])
+
+        robot = Robot.get(self.robot.id)
+        self.assertIsNone(robot.route_id)
+        self.assertEqual(robot.docking_station_id, self.docking_station.id)
+        self.assertIsNone(robot.current_robot_route())
+        self.assertIsNotNone(robot.robot_routes[0].end_ts)
+
+        robot_at_station = Robot.get(robot_at_station.id)
+        self.assertEqual(robot_at_station.route_id, new_route.id)
+        self.assertIsNone(robot_at_station.docking_station_id)
+        self.assertEqual(robot_at_station.current_robot_route().route_id, new_route.id)
+
+    def test_reassign_robots_all_to_routes(self):
+        robots = [Robot.create(None, self.docking_station.id) for _ in range(2)]
+        new_route = Route.create([[-70.10, 12.50], [-71.42, 10.92]])
+        json_data = json.dumps([{'robot_id': robot.id, 'route_id': new_route.id} for robot in robots + [self.robot]])
+        response = self.client.post(BASE_URL + '/reassignments', data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in data], ['moved', 'moved', 'moved'])
+        for robot in robots + [self.robot]:
+            robot = Robot.get(robot.id)
+            self.assertEqual(robot.route_id, new_route.id)
+            self.assertIsNone(robot.docking_station_id)
+
+    def test_reassign_robots_all_to_docking_stations(self):
+        robot2 = Robot.create(self.route.id, None)
+        json_data = json.dumps([{'robot_id': robot.id, 'docking_station_id': self.docking_station.id}
+                                for robot in [self.robot, robot2]])
+        response = self.client.post(BASE_URL + '/reassignments', data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in data], ['moved', 'moved'])
+        for robot in [self.robot, robot2]:
+            robot = Robot.get(robot.id)
+            self.assertIsNone(robot.route_id)
+            self.assertEqual(robot.docking_station_id, self.docking_station.id)
+            self.assertIsNone(robot.current_robot_route())
+
+    def test_reassign_robots_with_invalid_moves(self):
+        json_data = json.dumps([
+            {'robot_id': self.robot.id, 'route_id': self.route.id},
+            {'robot_id': 99, 'route_id': self.route.id},
+            {'robot_id': self.robot.id, 'route_id': 99, 'docking_station_id': self.docking_station.id}
+        ])
+        response = self.client.post(BASE_URL + '/reassignments', data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in data], ['unchanged', 'error', 'error'])
+        self.assertEqual(data[1]['error'], 'Robot 99 could not be found')
+        self.assertEqual(data[2]['error'], 'Robot must have route_id or docking_station_id')
+        self.assertEqual(len(Robot.get(self.robot.id).robot_routes), 1)
+
+    def test_reassign_robots_with_invalid_args(self):
+        json_data = json.dumps([{'route_id': self.route.id}])
+        response = self.client.post(BASE_URL + '/reassignments', data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': {'0': {'robot_id': ['Missing data for required field.']}}})
+
+    def test_get_robots_page(self):
+        robot2 = Robot.create(None, self.docking_station.id)
+        json_data = json.dumps({'limit': 1, 'after_id': self.robot.id})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [robot2.id])
+        self.assertNotIn('X-Next-Cursor', response.headers)
+
+    def test_get_robots_default_page(self):
+        robot2 = Robot.create(None, self.docking_station.id)
+        default_page_limit = self.app.config['DEFAULT_PAGE_LIMIT']
+        self.app.config['DEFAULT_PAGE_LIMIT'] = 1
+        try:
+            response = self.client.get(BASE_URL)
+        finally:
+            self.app.config['DEFAULT_PAGE_LIMIT'] = default_page_limit
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.robot.id])
+        self.assertEqual(response.headers['X-Next-Cursor'], str(self.robot.id))
+
+        json_data = json.dumps({'after_id': self.robot.id})
+        data = json.loads(self.client.get(BASE_URL, query_string=json_data).get_data())
+        self.assertEqual([item['id'] for item in data], [robot2.id])
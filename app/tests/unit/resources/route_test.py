@@ -36,6 +36,38 @@ class RouteAPITest(BaseTestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(data, expected_data.data)
 
+    def test_get_route_if_none_match(self):
+        url = BASE_URL + '/{}'.format(self.route.id)
+        response = self.client.get(url)
+        etag = response.headers['ETag']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response.headers)
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_get_route_if_none_match_after_update(self):
+        url = BASE_URL + '/{}'.format(self.route.id)
+        etag = self.client.get(url).headers['ETag']
+        self.route.update([[-74.0478, 12.4687], [-81.4199, 10.9196]])
+
+        response = self.client.get(url, headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_get_route_if_modified_since(self):
+        url = BASE_URL + '/{}'.format(self.route.id)
+        last_modified = self.client.get(url).headers['Last-Modified']
+
+        response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+
+        self.assertEqual(response.status_code, 304)
+
     def test_get_nonexistent_docking_station(self):
         url = BASE_URL + '/99'
         response = self.client.get(url)
@@ -52,6 +84,17 @@ class RouteAPITest(BaseTestCase):
         self.assertEqual(len(data), 2)
 
     def test_get_all_routes_with_target_ts(self):
+        robot = Robot.create(self.route.id, None)
+        dt = datetime.datetime.now().timestamp()
+        robot.update(self.route2.id, None)
+        json_data = json.dumps({'target_ts': dt, 'robot_id': robot.id})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.route.id])
+
+    def test_get_all_routes_with_target_ts_before_history(self):
         dt = datetime.datetime(2018, 1, 1).timestamp()
         robot = Robot.create(self.route.id, None)
         json_data = json.dumps({'target_ts': dt, 'robot_id': robot.id})
@@ -59,7 +102,7 @@ class RouteAPITest(BaseTestCase):
         data = json.loads(response.get_data())
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(len(data), 1)
+        self.assertEqual(data, [])
 
     def test_get_all_routes_with_invalid_target_ts(self):
         dt = 'abc'
@@ -165,3 +208,51 @@ class RouteAPITest(BaseTestCase):
 
         self.assertEqual(response.status_code, 400)
         self.assertEqual(data, {'errors': 'Latitude and/or Longitude are out of range'})
+
+    def test_create_route_with_malformed_points(self):
+        json_data = json.dumps({'points': [[11, 11], [12]]})
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': {'points': ['Not a valid list of [longitude, latitude] pairs.']}})
+
+    def test_create_routes(self):
+        json_data = json.dumps([{'points': [[11, 11], [12, 12]]}, {'points': [[13, 13], [14, 14], [15, 15]]}])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data), 2)
+        routes = [Route.get(item['id']) for item in data]
+        self.assertEqual(routes[1].points_array().tolist(), [[13, 13], [14, 14], [15, 15]])
+
+    def test_create_routes_with_invalid_points(self):
+        json_data = json.dumps([{'points': [[11, 11], [12, 12]]}, {'points': [[10301, 13001], [12, 12]]}])
+        response = self.client.post(BASE_URL, data=json_data, content_type='application/json')
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(data, {'errors': {'1': 'Latitude and/or Longitude are out of range'}})
+        self.assertEqual(len(Route.get_all()), 2)
+
+    def test_get_all_routes_with_ts_range_page(self):
+        robot = Robot.create(self.route.id, None)
+        robot.update(self.route2.id, None)
+        robot.update(self.route.id, None)
+
+        json_data = json.dumps({'robot_id': robot.id, 'limit': 2})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.route.id, self.route2.id])
+
+        after_id = int(response.headers['X-Next-Cursor'])
+        json_data = json.dumps({'robot_id': robot.id, 'limit': 2, 'after_id': after_id})
+        response = self.client.get(BASE_URL, query_string=json_data)
+        data = json.loads(response.get_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in data], [self.route.id])
+        self.assertNotIn('X-Next-Cursor', response.headers)
@@ -0,0 +1,91 @@
+"""
+Per call time of the hot lookups, rebuilt Query objects against the baked query cache.
+
+Times Base.get and robot route history, and a whole GET /robots/<id> with Base.get
+swapped for its unbaked version. The identity map is emptied before every call so each one runs its SELECT. Runs against DATABASE_URL,
+which must be a scratch database migrated with `flask db upgrade`: every table is emptied.
+
+    DATABASE_URL=postgresql://.../delivery_bench_db python -m benchmarks.baked_queries
+"""
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.models.base import Base
+from app.models.robot import Robot
+from app.models.robot_route import RobotRoute
+from app.models.route import Route
+from benchmarks.common import print_table, reset_db, timed
+
+app = create_app()
+
+REPEAT = 500
+HISTORY_LENGTH = 50
+
+
+def unbaked_get(cls, id):
+    return cls.query.get(id)
+
+
+def cold(fn):
+    # empty the identity map so lookups by id hit the database
+    def call():
+        db.session.expunge_all()
+        return fn()
+    return call
+
+
+def seed_history(robot, route):
+    start_ts = datetime(2019, 1, 1)
+    RobotRoute._insert_many([
+        {'robot_id': robot.id, 'route_id': route.id, 'start_ts': start_ts + timedelta(days=i),
+         'end_ts': start_ts + timedelta(days=i + 1)}
+        for i in range(HISTORY_LENGTH)
+    ])
+    db.session.commit()
+
+
+def main():
+    client = app.test_client()
+    rows = []
+    with app.app_context():
+        reset_db()
+        route = Route.create([[-75.4980, 12.1897], [-70.1, 15.2]])
+        robot = Robot.create(route.id, None)
+        robot_id = robot.id
+        seed_history(robot, route)
+        start_ts, end_ts = datetime(2019, 1, 10), datetime(2019, 1, 20)
+        url = '/api/v1.0/robots/{}'.format(robot_id)
+
+        def history():
+            return Robot.query.get(robot_id).routes_in_ts_range_query(start_ts, end_ts).all()
+
+        def baked_history():
+            return Robot.get(robot_id).find_routes_by_ts_range(start_ts, end_ts)
+
+        cases = [
+            ('Robot.get', lambda: unbaked_get(Robot, robot_id), lambda: Robot.get(robot_id)),
+            ('history', history, baked_history),
+        ]
+        for name, unbaked, baked in cases:
+            rows.append([
+                name,
+                '{:.3f}'.format(timed(cold(unbaked), REPEAT)),
+                '{:.3f}'.format(timed(cold(baked), REPEAT)),
+            ])
+
+        baked_request_ms = timed(lambda: client.get(url), REPEAT)
+        get = Base.__dict__['get']
+        Base.get = classmethod(unbaked_get)
+        try:
+            unbaked_request_ms = timed(lambda: client.get(url), REPEAT)
+        finally:
+            Base.get = get
+
+        rows.append(['GET /robots/<id>', '{:.3f}'.format(unbaked_request_ms), '{:.3f}'.format(baked_request_ms)])
+        reset_db()
+
+    print_table(['lookup', 'query ms', 'baked ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
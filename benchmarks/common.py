@@ -0,0 +1,68 @@
+import random
+import statistics
+import time
+
+from geoalchemy2.elements import WKTElement
+
+from app import db
+from app.common.helpers import validate_point
+from app.models.docking_station import DockingStation
+
+
+def timed(fn, repeat=20):
+    """Median wall time of fn in milliseconds."""
+    return statistics.median(sample(fn, repeat))
+
+
+def sample(fn, repeat=20):
+    """Wall times of repeat calls of fn in milliseconds, after one warm up call."""
+    fn()  # warm up caches and the connection pool
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'min_ms': round(ordered[0], 3),
+        'samples': len(ordered),
+    }
+
+
+def random_points(count, seed=0):
+    rng = random.Random(seed)
+    return [[rng.uniform(-180, 180), rng.uniform(-80, 80)] for _ in range(count)]
+
+
+def seed_docking_stations(count, seed=0):
+    rows = []
+    for longitude, latitude in random_points(count, seed):
+        validate_point(longitude, latitude)
+        rows.append({
+            'longitude': longitude,
+            'latitude': latitude,
+            'geo': WKTElement('POINT({} {})'.format(longitude, latitude), srid=4326),
+        })
+
+    db.session.execute(DockingStation.__table__.insert(), rows)
+    db.session.commit()
+
+
+def reset_db():
+    db.session.remove()
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+    db.session.commit()
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers] + rows:
+        print('  '.join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,77 @@
+"""
+Radius query time against docking station count.
+
+Compares the ST_Distance_Sphere filter the radius queries used to run with the
+index-aware ST_DWithin filter, both as the first page GET /docking_stations reads. Runs against DATABASE_URL, which must be a
+scratch database migrated with `flask db upgrade`: every table is emptied.
+
+    DATABASE_URL=postgresql://.../delivery_bench_db python -m benchmarks.docking_station_radius
+"""
+import json
+
+from sqlalchemy import func
+
+from app import create_app, db
+from app.common.helpers import default_page_limit
+from app.models.base import paginate
+from app.models.docking_station import DockingStation
+from app.models.route import Route
+from benchmarks.common import print_table, reset_db, seed_docking_stations, timed
+
+app = create_app()
+
+STATION_COUNTS = [1000, 10000, 100000]
+RADIUS = 500
+TARGET_LONGITUDE = -75.4980
+TARGET_LATITUDE = 12.1897
+
+
+def distance_sphere_in_radius():
+    target_point = 'SRID=4326;POINT({} {})'.format(TARGET_LONGITUDE, TARGET_LATITUDE)
+    query = DockingStation.query \
+        .filter(func.ST_Distance_Sphere(DockingStation.geo, target_point) <= RADIUS * 1852)
+    return paginate(query, DockingStation.id, default_page_limit())
+
+
+def distance_sphere_in_route_radius(route):
+    query = DockingStation.query \
+        .filter(func.ST_Distance_Sphere(DockingStation.geo, route.path) <= RADIUS * 1852)
+    return paginate(query, DockingStation.id, default_page_limit())
+
+
+def in_radius():
+    return DockingStation.get_all(json.dumps(
+        {'radius': RADIUS, 'target_longitude': TARGET_LONGITUDE, 'target_latitude': TARGET_LATITUDE}))
+
+
+def in_route_radius(route):
+    return DockingStation.get_all(json.dumps({'radius': RADIUS, 'route_id': route.id}))
+
+
+def main():
+    rows = []
+    with app.app_context():
+        for count in STATION_COUNTS:
+            reset_db()
+            seed_docking_stations(count)
+            db.session.execute('ANALYZE docking_station')
+            route = Route.create([[-75.4980, 12.1897], [-70.1, 15.2], [-65.3, 18.8]])
+
+            matches = len(in_radius())
+            assert matches == len(distance_sphere_in_radius())
+
+            rows.append([
+                count,
+                matches,
+                '{:.2f}'.format(timed(distance_sphere_in_radius)),
+                '{:.2f}'.format(timed(in_radius)),
+                '{:.2f}'.format(timed(lambda: distance_sphere_in_route_radius(route))),
+                '{:.2f}'.format(timed(lambda: in_route_radius(route))),
+            ])
+        reset_db()
+
+    print_table(['stations', 'page rows', 'sphere ms', 'dwithin ms', 'route sphere ms', 'route dwithin ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
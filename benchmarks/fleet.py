@@ -0,0 +1,117 @@
+"""
+A deterministic fleet: docking stations, routes, and robots with long robot route histories.
+
+The same arguments and seed always produce the same rows, so timings from different
+commits are comparable. Ids are whatever the database hands out, callers should use the
+returned Fleet rather than assume them.
+"""
+import random
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app import db
+from app.common.geo import linestring_ewkb, pack_points
+from app.models.docking_station import DockingStation
+from app.models.robot import Robot
+from app.models.robot_route import RobotRoute
+from app.models.route import Route
+from benchmarks.common import seed_docking_stations
+
+# every generated timestamp is after this, and robot route histories start here
+EPOCH = datetime(2019, 1, 1)
+# rows built in memory before they are inserted
+CHUNK_SIZE = 10000
+# route points built in memory before their routes are inserted
+ROUTE_CHUNK_POINTS = 1000000
+
+
+class Fleet(object):
+    def __init__(self, station_ids, route_ids, robot_ids, history_start, history_end):
+        self.station_ids = station_ids
+        self.route_ids = route_ids
+        self.robot_ids = robot_ids
+        # every robot has robot routes spanning at least this range
+        self.history_start = history_start
+        self.history_end = history_end
+
+
+def route_points(rng, count):
+    # a random walk of 1 to 10 NM steps, starting anywhere between 60S and 60N
+    longitude, latitude = rng.uniform(-170, 170), rng.uniform(-60, 60)
+    points = []
+    for _ in range(count):
+        longitude = min(max(longitude + rng.uniform(-0.15, 0.15), -180), 180)
+        latitude = min(max(latitude + rng.uniform(-0.15, 0.15), -80), 80)
+        points.append([longitude, latitude])
+
+    return points
+
+
+def generate_fleet(stations, routes, points_per_route, robots, history_length, seed=0):
+    """
+    Insert a fleet into the current database and return its ids.
+
+    Each robot gets history_length finished robot routes of 1 to 12 hours, back to back from
+    EPOCH. Four robots out of five then have an open robot route on their current route, the
+    others are docked at a station.
+    """
+    rng = random.Random(seed)
+
+    seed_docking_stations(stations, seed)
+    station_ids = [row[0] for row in db.session.query(DockingStation.id).order_by(DockingStation.id)]
+
+    route_ids = []
+    routes_per_chunk = max(1, ROUTE_CHUNK_POINTS // points_per_route)
+    for i in range(0, routes, routes_per_chunk):
+        rows = []
+        for _ in range(i, min(routes, i + routes_per_chunk)):
+            points = route_points(rng, points_per_route)
+            rows.append({
+                'path': sa.func.ST_GeomFromEWKB(linestring_ewkb(points)),
+                'points': pack_points(points),
+                'created_ts': EPOCH,
+            })
+        route_ids.extend(Route._insert_many(rows))
+        db.session.commit()
+
+    robot_rows = []
+    for i in range(robots):
+        docked = i % 5 == 4
+        robot_rows.append({
+            'route_id': None if docked else rng.choice(route_ids),
+            'docking_station_id': rng.choice(station_ids) if docked else None,
+            'created_ts': EPOCH,
+        })
+    table = Robot.__table__
+    robot_assignments = []
+    for i in range(0, len(robot_rows), CHUNK_SIZE):
+        robot_assignments.extend(Robot._insert_many(robot_rows[i:i + CHUNK_SIZE], table.c.id, table.c.route_id))
+    db.session.commit()
+
+    history_end = None
+    rows = []
+    for robot_id, current_route_id in robot_assignments:
+        start_ts = EPOCH
+        for _ in range(history_length):
+            end_ts = start_ts + timedelta(hours=rng.uniform(1, 12))
+            rows.append({'robot_id': robot_id, 'route_id': rng.choice(route_ids), 'start_ts': start_ts,
+                         'end_ts': end_ts})
+            start_ts = end_ts
+        if current_route_id:
+            rows.append({'robot_id': robot_id, 'route_id': current_route_id, 'start_ts': start_ts, 'end_ts': None})
+
+        history_end = start_ts if history_end is None else min(history_end, start_ts)
+        if len(rows) >= CHUNK_SIZE:
+            RobotRoute._insert_many(rows)
+            rows = []
+    if rows:
+        RobotRoute._insert_many(rows)
+    db.session.commit()
+
+    for table_name in ('docking_station', 'route', 'robot', 'robot_route'):
+        db.session.execute('ANALYZE {}'.format(table_name))
+    db.session.commit()
+
+    return Fleet(station_ids, route_ids, [robot_id for robot_id, _ in robot_assignments], EPOCH,
+                 history_end or EPOCH)
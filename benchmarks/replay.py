@@ -0,0 +1,177 @@
+"""
+Replays requests recorded with REQUEST_LOG_PATH and reports latency and throughput per endpoint.
+
+Requests are sent at their recorded pace, divided by --speed (0 sends them as fast as the
+workers allow), by --concurrency worker threads. Without --url they go to the app through
+the Flask test client, against DATABASE_URL; with --url, to a running server.
+
+    python -m benchmarks.replay traffic.jsonl --concurrency 8 --speed 4
+    python -m benchmarks.replay traffic.jsonl --url http://127.0.0.1:5000
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from benchmarks.common import print_table
+
+
+def load(path):
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+
+    entries.sort(key=lambda entry: entry['ts'])
+    return entries
+
+
+def percentile(ordered, fraction):
+    # nearest rank
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def compact_query(query):
+    # http.client refuses spaces in urls, and the api reads the query string as raw json
+    try:
+        return json.dumps(json.loads(query), separators=(',', ':'))
+    except ValueError:
+        return query
+
+
+class TestClientTarget(object):
+    def __init__(self):
+        from app import create_app
+
+        self.app = create_app()
+
+    def sender(self):
+        client = self.app.test_client()
+
+        def send(entry):
+            response = client.open(entry['path'], method=entry['method'], query_string=entry['query'] or None,
+                                   json=entry['body'], headers=entry.get('headers', {}))
+            response.get_data()
+            return response.status_code
+
+        return send
+
+
+class ServerTarget(object):
+    def __init__(self, url):
+        url = urlsplit(url)
+        self.host, self.port = url.hostname, url.port or 80
+
+    def sender(self):
+        def send(entry):
+            path = entry['path']
+            if entry['query']:
+                path += '?' + compact_query(entry['query'])
+
+            headers = dict(entry.get('headers', {}))
+            body = None
+            if entry['body'] is not None:
+                body = json.dumps(entry['body'])
+                headers['Content-Type'] = 'application/json'
+
+            connection = http.client.HTTPConnection(self.host, self.port)
+            try:
+                connection.request(entry['method'], path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            finally:
+                connection.close()
+
+        return send
+
+
+def replay(entries, target, concurrency=1, speed=1.0):
+    """Latencies in ms and error counts by endpoint, and the wall time of the whole replay."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    next_index = [0]
+    first_ts = entries[0]['ts'] if entries else 0
+
+    start = time.perf_counter()
+
+    def work():
+        send = target.sender()
+        while True:
+            with lock:
+                i = next_index[0]
+                if i == len(entries):
+                    return
+                next_index[0] += 1
+
+            entry = entries[i]
+            if speed:
+                delay = (entry['ts'] - first_ts) / speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+
+            name = '{} {}'.format(entry['method'], entry.get('endpoint') or entry['path'])
+            sent = time.perf_counter()
+            try:
+                status = send(entry)
+            except Exception:
+                status = None
+            ms = (time.perf_counter() - sent) * 1000
+
+            with lock:
+                latencies[name].append(ms)
+                if status is None or status >= 500:
+                    errors[name] += 1
+
+    workers = [threading.Thread(target=work) for _ in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(latencies, errors, elapsed):
+    rows = []
+    everything = []
+    for name in sorted(latencies):
+        ordered = sorted(latencies[name])
+        everything.extend(ordered)
+        rows.append(row(name, ordered, errors[name], elapsed))
+
+    everything.sort()
+    if everything:
+        rows.append(row('all', everything, sum(errors.values()), elapsed))
+    print_table(['endpoint', 'requests', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s'], rows)
+
+
+def row(name, ordered, error_count, elapsed):
+    return [
+        name,
+        len(ordered),
+        error_count,
+        '{:.2f}'.format(percentile(ordered, 0.5)),
+        '{:.2f}'.format(percentile(ordered, 0.95)),
+        '{:.2f}'.format(percentile(ordered, 0.99)),
+        '{:.1f}'.format(len(ordered) / elapsed if elapsed else 0),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', help='a file written with REQUEST_LOG_PATH')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--speed', type=float, default=1.0, help='pace multiplier, 0 for no pauses')
+    parser.add_argument('--url', help='a running server, instead of the test client')
+    args = parser.parse_args()
+
+    target = ServerTarget(args.url) if args.url else TestClientTarget()
+    latencies, errors, elapsed = replay(load(args.path), target, args.concurrency, args.speed)
+    report(latencies, errors, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Creating routes of 1k, 10k and 100k points, before and after vectorized ingestion.
+
+The legacy path validates and formats a WKT string per point and has the database
+parse them in ST_MakeLine. Runs against DATABASE_URL, which must be a scratch
+database migrated with `flask db upgrade`: every table is emptied.
+
+    DATABASE_URL=postgresql://.../delivery_bench_db python -m benchmarks.route_ingest
+"""
+import sqlalchemy as sa
+from marshmallow import Schema, fields
+
+from app import create_app, db
+from app.common.geo import pack_points
+from app.common.helpers import validate_point
+from app.models.route import Route
+from app.schemas.route import RouteSchema
+from benchmarks.common import print_table, random_points, reset_db, timed
+
+app = create_app()
+
+POINT_COUNTS = [1000, 10000, 100000]
+
+
+class LegacyRouteSchema(Schema):
+    points = fields.List(fields.List(fields.Float), required=True)
+
+
+def legacy_create(points):
+    geo_points = []
+    for longitude, latitude in points:
+        validate_point(longitude, latitude)
+        geo_points.append('POINT({} {})'.format(longitude, latitude))
+
+    route = Route(path=sa.func.ST_MakeLine(geo_points), points=pack_points(points))
+    db.session.add(route)
+    db.session.commit()
+    return route
+
+
+def main():
+    legacy_schema = LegacyRouteSchema()
+    schema = RouteSchema()
+
+    rows = []
+    with app.app_context():
+        reset_db()
+        for count in POINT_COUNTS:
+            points = random_points(count)
+            payload = {'points': points}
+            repeat = 10 if count < 100000 else 3
+
+            rows.append([
+                count,
+                '{:.1f}'.format(timed(lambda: legacy_schema.load(payload), repeat)),
+                '{:.1f}'.format(timed(lambda: schema.load(payload), repeat)),
+                '{:.1f}'.format(timed(lambda: legacy_create(points), repeat)),
+                '{:.1f}'.format(timed(lambda: Route.create(points), repeat)),
+            ])
+            reset_db()
+
+    print_table(['points', 'legacy load ms', 'load ms', 'legacy create ms', 'create ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
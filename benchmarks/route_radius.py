@@ -0,0 +1,61 @@
+"""
+Docking stations within a radius of long routes, PostGIS against NumPy.
+
+Runs against DATABASE_URL, which must be a scratch database migrated with
+`flask db upgrade`: every table is emptied.
+
+    DATABASE_URL=postgresql://.../delivery_bench_db python -m benchmarks.route_radius
+"""
+import random
+
+from app import create_app
+from app.models.docking_station import DockingStation
+from app.models.route import Route
+from benchmarks.common import print_table, reset_db, seed_docking_stations, timed
+
+app = create_app()
+
+STATION_COUNT = 20000
+ROUTE_POINT_COUNTS = [1000, 10000, 50000]
+RADIUS = 50
+
+
+def ocean_route(count, seed=0):
+    # a random walk across the Pacific with steps of roughly 1 to 5 NM
+    rng = random.Random(seed)
+    longitude, latitude = -150.0, 0.0
+    points = []
+    for _ in range(count):
+        longitude = min(max(longitude + rng.uniform(0, 0.08), -179.9), 179.9)
+        latitude = min(max(latitude + rng.uniform(-0.05, 0.05), -60), 60)
+        points.append([longitude, latitude])
+
+    return points
+
+
+def main():
+    rows = []
+    with app.app_context():
+        reset_db()
+        seed_docking_stations(STATION_COUNT)
+
+        for count in ROUTE_POINT_COUNTS:
+            route = Route.create(ocean_route(count))
+
+            app.config['ROUTE_RADIUS_BACKEND'] = 'postgis'
+            postgis_ids = sorted(station.id for station in DockingStation.get_all_in_route_radius(route, RADIUS))
+            postgis_ms = timed(lambda: DockingStation.get_all_in_route_radius(route, RADIUS), repeat=5)
+
+            app.config['ROUTE_RADIUS_BACKEND'] = 'numpy'
+            numpy_ids = sorted(station.id for station in DockingStation.get_all_in_route_radius(route, RADIUS))
+            numpy_ms = timed(lambda: DockingStation.get_all_in_route_radius(route, RADIUS), repeat=5)
+
+            rows.append([count, len(postgis_ids), len(numpy_ids),
+                         '{:.2f}'.format(postgis_ms), '{:.2f}'.format(numpy_ms)])
+        reset_db()
+
+    print_table(['route points', 'postgis matches', 'numpy matches', 'postgis ms', 'numpy ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Rows per second dumped by the list schemas, marshmallow's dump against the compiled one.
+
+Serializes unsaved model instances, so no database is needed.
+
+    python -m benchmarks.serializers
+"""
+import datetime
+
+from app.models.docking_station import DockingStation
+from app.models.robot import Robot
+from app.models.route import Route
+from app.schemas.compiled import compile_schema
+from app.schemas.docking_station import DockingStationSchema
+from app.schemas.robot import RobotSchema
+from app.schemas.route import RouteSchema
+from benchmarks.common import print_table, random_points, timed
+
+ROW_COUNT = 10000
+
+
+def fleet(count):
+    created_ts = datetime.datetime(2019, 7, 1)
+    modified_ts = datetime.datetime(2019, 7, 2)
+    points = random_points(count)
+    return {
+        'robots': [Robot(id=i, route_id=i if i % 2 else None, docking_station_id=None if i % 2 else i,
+                         created_ts=created_ts, modified_ts=modified_ts) for i in range(count)],
+        'routes': [Route(id=i, created_ts=created_ts) for i in range(count)],
+        'docking_stations': [DockingStation(id=i, longitude=longitude, latitude=latitude, created_ts=created_ts)
+                             for i, (longitude, latitude) in enumerate(points)],
+    }
+
+
+def main():
+    instances = fleet(ROW_COUNT)
+    schemas = [
+        ('robots', RobotSchema(many=True)),
+        ('routes', RouteSchema(many=True)),
+        ('docking_stations', DockingStationSchema(many=True)),
+    ]
+
+    rows = []
+    for name, schema in schemas:
+        compiled = compile_schema(schema)
+        assert compiled.dump(instances[name]).data == schema.dump(instances[name]).data
+
+        ms = timed(lambda: schema.dump(instances[name]), 5)
+        compiled_ms = timed(lambda: compiled.dump(instances[name]), 5)
+        rows.append([
+            name,
+            '{:,.0f}'.format(ROW_COUNT / ms * 1000),
+            '{:,.0f}'.format(ROW_COUNT / compiled_ms * 1000),
+            '{:.1f}x'.format(ms / compiled_ms),
+        ])
+
+    print_table(['schema', 'dump rows/s', 'compiled rows/s', 'speedup'], rows)
+
+
+if __name__ == '__main__':
+    main()
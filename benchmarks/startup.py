@@ -0,0 +1,74 @@
+"""
+Cold start time of the app, each case the median of --repeat fresh interpreters.
+
+- import app: the package alone, what a script that only needs db pays
+- create_app: building the app, what a pre-fork server does before it forks
+- worker first request: create_app() and a first request that does not touch the database
+- cli: `flask routes` through main.py, which also loads Flask-Migrate and alembic
+
+Nothing here connects to the database. --imports lists the slowest imports of a worker.
+
+    python -m benchmarks.startup --repeat 10 --imports 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER = 'from app import create_app; create_app().test_client().get("/metrics")'
+CASES = [
+    ('import app', [sys.executable, '-c', 'import app']),
+    ('create_app', [sys.executable, '-c', 'from app import create_app; create_app()']),
+    ('worker first request', [sys.executable, '-c', WORKER]),
+    ('cli', [sys.executable, '-m', 'flask', 'routes']),
+]
+
+
+def run(command, repeat):
+    env = dict(os.environ, FLASK_APP='main.py')
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(samples)
+
+
+def slowest_imports(count):
+    # top level imports of a worker by cumulative time, in microseconds
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', WORKER], cwd=PROJECT_ROOT,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True, universal_newlines=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  '):
+            imports.append((int(cumulative), name.strip()))
+
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    from benchmarks.common import print_table
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--imports', type=int, default=0, help='list this many of the slowest imports')
+    args = parser.parse_args()
+
+    print_table(['case', 'median ms'], [[name, '{:.0f}'.format(run(command, args.repeat))]
+                                        for name, command in CASES])
+
+    if args.imports:
+        print_table(['import', 'cumulative ms'], [[name, '{:.1f}'.format(cumulative / 1000)]
+                                                  for cumulative, name in slowest_imports(args.imports)])
+
+
+if __name__ == '__main__':
+    main()
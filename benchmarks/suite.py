@@ -0,0 +1,221 @@
+"""
+Times every endpoint and model hot path against generated fleets of several sizes.
+
+Each scale truncates every table, generates its fleet (see benchmarks.fleet), then times
+the reads, then the writes. Results are written to a JSON file; pass an earlier file as
+--compare to print the change of every median and flag regressions. Runs against
+DATABASE_URL, which must be a scratch database migrated with `flask db upgrade`.
+
+    DATABASE_URL=postgresql://.../delivery_bench_db python -m benchmarks.suite \\
+        --scales small medium --output bench.json --compare previous.json
+"""
+import argparse
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+from app import create_app, db
+from app.common.robot_timeline import robot_timelines
+from app.common.spatial_index import docking_station_index
+from app.models.docking_station import DockingStation
+from app.models.robot import Robot
+from app.models.robot_route import RobotRoute
+from app.models.route import Route
+from benchmarks.common import print_table, random_points, sample, summarize
+from benchmarks.fleet import generate_fleet
+
+app = create_app()
+
+SCALES = {
+    'small': {'stations': 1000, 'routes': 100, 'points_per_route': 100, 'robots': 100, 'history_length': 100},
+    'medium': {'stations': 10000, 'routes': 1000, 'points_per_route': 500, 'robots': 1000, 'history_length': 500},
+    'large': {'stations': 100000, 'routes': 5000, 'points_per_route': 1000, 'robots': 10000, 'history_length': 200},
+}
+RADIUS = 100
+ROUTE_RADIUS = 20
+# a median this much slower than the compared run is flagged
+REGRESSION_THRESHOLD = 0.1
+
+
+def truncate_all():
+    db.session.remove()
+    tables = ', '.join(table.name for table in db.metadata.sorted_tables)
+    db.session.execute('TRUNCATE {} RESTART IDENTITY CASCADE'.format(tables))
+    db.session.commit()
+    robot_timelines.clear()
+    docking_station_index.clear()
+
+
+def endpoint(client, method, url, query_string=None, body=None):
+    query_string = json.dumps(query_string) if query_string else None
+
+    def call():
+        response = client.open(url, method=method, query_string=query_string, json=body)
+        if response.status_code >= 400:
+            raise RuntimeError('{} {} returned {}'.format(method, url, response.status_code))
+        # streamed responses only run their queries when read
+        response.get_data()
+
+    return call
+
+
+def in_app_context(fn):
+    # a fresh session per call, as a request would have
+    def call():
+        with app.app_context():
+            return fn()
+    return call
+
+
+def read_cases(client, fleet):
+    robot_id, route_id, station_id = fleet.robot_ids[0], fleet.route_ids[0], fleet.station_ids[0]
+    with app.app_context():
+        station = DockingStation.get(station_id)
+        longitude, latitude = station.longitude, station.latitude
+
+    span = fleet.history_end - fleet.history_start
+    start_ts, end_ts = fleet.history_start + span / 4, fleet.history_start + span / 2
+    # query string timestamps are UTC
+    start, end = [(ts - datetime(1970, 1, 1)).total_seconds() for ts in (start_ts, end_ts)]
+
+    def route_radius(backend):
+        def call():
+            app.config['ROUTE_RADIUS_BACKEND'] = backend
+            try:
+                return DockingStation.get_all_in_route_radius(Route.get(route_id), ROUTE_RADIUS)
+            finally:
+                app.config['ROUTE_RADIUS_BACKEND'] = 'postgis'
+        return call
+
+    return [
+        ('GET /robots/<id>', endpoint(client, 'GET', '/api/v1.0/robots/{}'.format(robot_id))),
+        ('GET /routes/<id>', endpoint(client, 'GET', '/api/v1.0/routes/{}'.format(route_id))),
+        ('GET /docking_stations/<id>', endpoint(client, 'GET', '/api/v1.0/docking_stations/{}'.format(station_id))),
+        ('GET /robots', endpoint(client, 'GET', '/api/v1.0/robots')),
+        ('GET /robots page', endpoint(client, 'GET', '/api/v1.0/robots', {'limit': 100})),
+        ('GET /routes', endpoint(client, 'GET', '/api/v1.0/routes')),
+        ('GET /docking_stations', endpoint(client, 'GET', '/api/v1.0/docking_stations')),
+        ('GET /docking_stations radius', endpoint(client, 'GET', '/api/v1.0/docking_stations', {
+            'radius': RADIUS, 'target_longitude': longitude, 'target_latitude': latitude})),
+        ('GET /docking_stations route radius', endpoint(client, 'GET', '/api/v1.0/docking_stations', {
+            'radius': ROUTE_RADIUS, 'route_id': route_id})),
+        ('GET /docking_stations nearest', endpoint(client, 'GET', '/api/v1.0/docking_stations', {
+            'nearest': 10, 'target_longitude': longitude, 'target_latitude': latitude})),
+        ('GET /routes history range', endpoint(client, 'GET', '/api/v1.0/routes', {
+            'robot_id': robot_id, 'start_ts': start, 'end_ts': end})),
+        ('GET /robots/snapshot', endpoint(client, 'GET', '/api/v1.0/robots/snapshot', {'target_ts': end})),
+        ('GET /robots/positions', endpoint(client, 'GET', '/api/v1.0/robots/positions', {'target_ts': end})),
+        ('DockingStation.get_all_in_radius', in_app_context(
+            lambda: DockingStation.get_all_in_radius(longitude, latitude, RADIUS))),
+        ('DockingStation.get_all_in_route_radius postgis', in_app_context(route_radius('postgis'))),
+        ('DockingStation.get_all_in_route_radius numpy', in_app_context(route_radius('numpy'))),
+        ('Robot.find_routes_by_ts_range', in_app_context(
+            lambda: Robot.get(robot_id).find_routes_by_ts_range(start_ts, end_ts))),
+        ('Robot.find_route_by_ts', in_app_context(lambda: Robot.get(robot_id).find_route_by_ts(end_ts))),
+        ('Route.get_all', in_app_context(Route.get_all)),
+        ('RobotRoute.get_assignments_at_ts', in_app_context(
+            lambda: RobotRoute.get_assignments_at_ts(end_ts).all())),
+        ('Robot.positions_at_ts', in_app_context(lambda: Robot.positions_at_ts(end_ts))),
+    ]
+
+
+def write_cases(client, fleet):
+    robot_id = fleet.robot_ids[0]
+    moved_robot_ids = [id for i, id in enumerate(fleet.robot_ids[:125]) if i % 5 != 4]
+    route_ids = fleet.route_ids[:2]
+    toggle = {'i': 0}
+
+    def next_route_id():
+        toggle['i'] += 1
+        return route_ids[toggle['i'] % len(route_ids)]
+
+    def put_robot():
+        return endpoint(client, 'PUT', '/api/v1.0/robots/{}'.format(robot_id),
+                        body={'route_id': next_route_id()})()
+
+    def reassign():
+        route_id = next_route_id()
+        moves = [{'robot_id': id, 'route_id': route_id} for id in moved_robot_ids]
+        return endpoint(client, 'POST', '/api/v1.0/robots/reassignments', body=moves)()
+
+    return [
+        ('POST /docking_stations', endpoint(client, 'POST', '/api/v1.0/docking_stations',
+                                            body={'longitude': -75.4980, 'latitude': 12.1897})),
+        ('POST /routes 1k points', endpoint(client, 'POST', '/api/v1.0/routes', body={'points': random_points(1000)})),
+        ('PUT /robots/<id>', put_robot),
+        ('POST /robots/reassignments 100', reassign),
+    ]
+
+
+def run_scale(name, repeat):
+    config = SCALES[name]
+    with app.app_context():
+        truncate_all()
+        fleet = generate_fleet(**config)
+
+    client = app.test_client()
+    results = {}
+    for case, fn in read_cases(client, fleet) + write_cases(client, fleet):
+        results[case] = summarize(sample(fn, repeat))
+        print('{:>8}  {:<48} {:>10.3f} ms'.format(name, case, results[case]['median_ms']))
+
+    with app.app_context():
+        truncate_all()
+
+    return {'config': config, 'results': results}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    rows = []
+    for scale, run in current['scales'].items():
+        previous_results = previous.get('scales', {}).get(scale, {}).get('results', {})
+        for case, result in run['results'].items():
+            if case not in previous_results:
+                continue
+            before, after = previous_results[case]['median_ms'], result['median_ms']
+            change = (after - before) / before if before else 0
+            rows.append([scale, case, '{:.3f}'.format(before), '{:.3f}'.format(after), '{:+.1%}'.format(change),
+                         'REGRESSION' if change > REGRESSION_THRESHOLD else ''])
+
+    print_table(['scale', 'case', 'before ms', 'after ms', 'change', ''], rows)
+    return sum(1 for row in rows if row[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=sorted(SCALES), default=['small', 'medium'])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--compare', help='an earlier output file')
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'created': datetime.utcnow().isoformat(),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'repeat': args.repeat,
+        },
+        'scales': {name: run_scale(name, args.repeat) for name in args.scales},
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print('wrote {}'.format(args.output))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report)
+        if regressions:
+            raise SystemExit('{} regressions over {:.0%}'.format(regressions, REGRESSION_THRESHOLD))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,17 @@
-from app import app
-from app import db
-from app.models.robot import Robot
-from app.models.robot_route import RobotRoute
-from app.models.route import Route
-from app.models.docking_station import DockingStation
+from flask_migrate import Migrate
+
+from app import create_app, db
+
+app = create_app()
+# for the flask db commands, workers built with create_app() alone never import alembic
+migrate = Migrate(app, db)
 
 
 @app.shell_context_processor
 def make_shell_context():
+    from app.models.robot import Robot
+    from app.models.robot_route import RobotRoute
+    from app.models.route import Route
+    from app.models.docking_station import DockingStation
+
     return {'db': db, 'Robot': Robot, 'RobotRoute': RobotRoute, 'Route': Route, 'DockingStation': DockingStation}
@@ -0,0 +1,18 @@
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e1f0b2d4'
+down_revision = '92d18f8367d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_robot_route_robot_id_start_ts_end_ts', 'robot_route',
+                    ['robot_id', 'start_ts', 'end_ts'], unique=False)
+
+
+def downgrade():
+    op.drop_index('idx_robot_route_robot_id_start_ts_end_ts', table_name='robot_route')
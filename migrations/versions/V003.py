@@ -0,0 +1,18 @@
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2d9a41b86'
+down_revision = 'a3c5e1f0b2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # radius queries compare geographies with ST_DWithin, so index the same expression
+    op.execute('CREATE INDEX idx_docking_station_geography ON docking_station USING gist (geography(geo))')
+
+
+def downgrade():
+    op.drop_index('idx_docking_station_geography', table_name='docking_station')
@@ -0,0 +1,69 @@
+import json
+import re
+import struct
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8f2c6d913'
+down_revision = 'c7e2d9a41b86'
+branch_labels = None
+depends_on = None
+
+# points were stored as json ["POINT(longitude latitude)", ...], or as a postgres
+# text array of the same strings when written by Route.update
+WKT_POINT = re.compile(r'POINT\(\s*(\S+)\s+(\S+?)\s*\)')
+BATCH_SIZE = 1000
+
+
+def _pack(points):
+    coordinates = [float(coordinate) for point in points for coordinate in point]
+    return struct.pack('<{}d'.format(len(coordinates)), *coordinates)
+
+
+def _unpack(data):
+    coordinates = struct.unpack('<{}d'.format(len(data) // 8), data)
+    return list(zip(coordinates[0::2], coordinates[1::2]))
+
+
+def _backfill(conn, select, update, convert):
+    last_id = 0
+    while True:
+        rows = conn.execute(select, last_id=last_id, limit=BATCH_SIZE).fetchall()
+        if not rows:
+            return
+
+        conn.execute(update, [{'route_id': id, 'value': convert(points)} for id, points in rows])
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    op.add_column('route', sa.Column('packed_points', sa.LargeBinary(), nullable=True))
+
+    conn = op.get_bind()
+    _backfill(
+        conn,
+        sa.text('SELECT id, points FROM route WHERE id > :last_id ORDER BY id LIMIT :limit'),
+        sa.text('UPDATE route SET packed_points = :value WHERE id = :route_id'),
+        lambda points: _pack(WKT_POINT.findall(points)),
+    )
+
+    op.drop_column('route', 'points')
+    op.alter_column('route', 'packed_points', new_column_name='points', nullable=False)
+
+
+def downgrade():
+    op.add_column('route', sa.Column('text_points', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    _backfill(
+        conn,
+        sa.text('SELECT id, points FROM route WHERE id > :last_id ORDER BY id LIMIT :limit'),
+        sa.text('UPDATE route SET text_points = :value WHERE id = :route_id'),
+        lambda points: json.dumps(['POINT({} {})'.format(*point) for point in _unpack(bytes(points))]),
+    )
+
+    op.drop_column('route', 'points')
+    op.alter_column('route', 'text_points', new_column_name='points', nullable=False)
@@ -0,0 +1,44 @@
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7c3d5e208'
+down_revision = 'e4b8f2c6d913'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ['docking_station', 'route', 'robot', 'robot_route']
+BUMP_TABLE_VERSION = """
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_version (table_name, version) VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (table_name) DO UPDATE SET version = table_version.version + 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+TABLE_VERSION_TRIGGER = (
+    'CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+    'FOR EACH STATEMENT EXECUTE PROCEDURE bump_table_version()'
+)
+
+
+def upgrade():
+    # list etags read these counters instead of aggregating over the whole table
+    op.create_table(
+        'table_version',
+        sa.Column('table_name', sa.Text(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute(BUMP_TABLE_VERSION)
+    for table in VERSIONED_TABLES:
+        op.execute(TABLE_VERSION_TRIGGER.format(table=table))
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.execute('DROP TRIGGER {table}_version ON {table}'.format(table=table))
+    op.execute('DROP FUNCTION bump_table_version()')
+    op.drop_table('table_version')